@@ -156,7 +156,10 @@ MEDIA_URL = "/media/"
 # salesman
 SALESMAN_PRODUCT_TYPES = {
     "shop.Product": "shop.serializers.ProductSerializer",
-    "shop.PhoneVariant": "shop.serializers.PhoneVariantSerializer",
+    "shop.PhoneVariant": {
+        "serializer": "shop.serializers.PhoneVariantSerializer",
+        "select_related": ["phone"],
+    },
 }
 SALESMAN_BASKET_MODIFIERS = [
     "shop.modifiers.DiscountModifier",
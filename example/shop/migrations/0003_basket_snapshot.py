@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:03
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0002_rename_owner_field"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="basket",
+            name="snapshot",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                encoder=django.core.serializers.json.DjangoJSONEncoder,
+                verbose_name="Snapshot",
+            ),
+        ),
+    ]
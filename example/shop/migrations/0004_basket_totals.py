@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:53
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_totals(apps, schema_editor):
+    Basket = apps.get_model("shop", "Basket")
+    BasketItem = apps.get_model("shop", "BasketItem")
+    items = (
+        BasketItem.objects.filter(basket=models.OuterRef("pk"))
+        .order_by()
+        .values("basket")
+    )
+    count = items.annotate(value=models.Count("pk")).values("value")
+    quantity = items.annotate(value=models.Sum("quantity")).values("value")
+    Basket.objects.update(
+        item_count=Coalesce(models.Subquery(count), 0),
+        total_quantity=Coalesce(models.Subquery(quantity), 0),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shop", "0003_basket_snapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="basket",
+            name="item_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Item count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="basket",
+            name="total_quantity",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Total quantity"
+            ),
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
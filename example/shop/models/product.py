@@ -16,6 +16,11 @@ class Product(models.Model):
     def get_price(self, request):
         return self.price
 
+    @classmethod
+    def get_prices(cls, products, request):
+        # Optional, price many products at once.
+        return [product.price for product in products]
+
     @property
     def code(self):
         return str(self.id)
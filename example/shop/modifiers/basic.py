@@ -21,6 +21,7 @@ class SpecialTaxModifier(BasketModifier):
     """
 
     identifier = "special-tax"
+    item_local = True
 
     def process_item(self, item, request):
         if item.total > 99:
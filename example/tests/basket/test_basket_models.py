@@ -1,19 +1,35 @@
+from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
 import pytest
-from django.db import transaction
+from asgiref.sync import async_to_sync
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import QuerySet
 from django.db.models.deletion import ProtectedError
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from salesman.basket.models import BASKET_ID_SESSION_KEY
-from salesman.core.utils import get_salesman_model
+from salesman.basket.models import BASKET_ID_SESSION_KEY, USER_BASKET_CACHE_KEY
+from salesman.basket.modifiers import basket_modifiers_pool
+from salesman.core.utils import get_salesman_cache, get_salesman_model
 from shop.models import Phone, PhoneVariant, Product
+from shop.modifiers import DiscountModifier, SpecialTaxModifier
 
 Basket = get_salesman_model("Basket")
 BasketItem = get_salesman_model("BasketItem")
 
 
 @pytest.mark.django_db
-def test_get_or_create_basket_from_request(rf, django_user_model):
+def test_get_or_create_basket_from_request(
+    rf, django_user_model, django_assert_num_queries
+):
     request = rf.get("/")
 
     # test session basket created
@@ -35,12 +51,48 @@ def test_get_or_create_basket_from_request(rf, django_user_model):
     _, created = Basket.objects.get_or_create_from_request(request)
     assert not created
 
-    # test multiple baskets merge, 1 should be left
+    # test user basket id is cached
     Basket.objects.create(user=request.user)
+    with django_assert_num_queries(1):
+        assert Basket.objects.get_or_create_from_request(request)[0] == basket
+
+    # test multiple baskets merge when basket id isn't cached, 1 should be left
+    get_salesman_cache().delete(USER_BASKET_CACHE_KEY.format(user_id=basket.user_id))
     basket, _ = Basket.objects.get_or_create_from_request(request)
     assert request.user.basket_set.count() == 1
 
 
+@pytest.mark.django_db
+def test_get_basket_from_request_lazy(rf, django_user_model):
+    request = rf.get("/")
+    request.session = {}
+
+    # test lazy basket is not saved until the first write
+    basket = Basket.objects.get_from_request(request)
+    assert basket.pk is None
+    assert Basket.objects.get_from_request(request) is basket
+    assert basket.count == 0 and basket.get_items() == []
+    basket.update(request)
+    assert basket.total == 0
+    basket.clear()
+    assert not Basket.objects.exists()
+    assert BASKET_ID_SESSION_KEY not in request.session
+    basket.add(Product.objects.create(name="Test", price=10))
+    assert basket.pk and basket.count == 1
+    assert request.session[BASKET_ID_SESSION_KEY] == basket.pk
+
+    # test lazy user basket
+    request = rf.get("/")
+    request.user = django_user_model.objects.create_user(username="user")
+    basket, created = Basket.objects.get_or_create_from_request(request, lazy=True)
+    assert basket.pk is None and not created
+    basket.extra = {"test": 1}
+    basket.save()
+    cache_key = USER_BASKET_CACHE_KEY.format(user_id=request.user.id)
+    assert get_salesman_cache().get(cache_key) == basket.pk
+    assert Basket.objects.get_or_create_from_request(request, lazy=True)[0] == basket
+
+
 @pytest.mark.django_db
 def test_basket_str():
     basket = Basket()
@@ -68,6 +120,268 @@ def test_basket_update(rf):
     assert len(basket.extra_rows) == 1
 
 
+@pytest.mark.django_db
+def test_basket_update_memoized(rf):
+    request = rf.get("/")
+    basket, _ = Basket.objects.get_or_create_from_request(request)
+    product = Product.objects.create(name="Test", price=30)
+    basket.add(product)
+
+    update = BasketItem.update
+    with mock.patch.object(BasketItem, "update", autospec=True) as item_update:
+        item_update.side_effect = update
+        basket.ensure_priced(request)
+        basket.ensure_priced(request)
+        assert item_update.call_count == 1
+        assert basket.is_priced(request)
+
+        # test new request triggers pricing, unchanged item results are reused
+        set_priced = Basket.set_priced
+        with mock.patch.object(Basket, "set_priced", autospec=True) as priced:
+            priced.side_effect = set_priced
+            basket.ensure_priced(rf.get("/"))
+            assert priced.call_count == 1
+            assert item_update.call_count == 1
+
+        # test basket change triggers pricing
+        basket.add(product)
+        assert not basket.is_priced(request)
+        basket.ensure_priced(request)
+        assert item_update.call_count == 2
+        assert basket.subtotal == 60
+
+        # test removed result triggers pricing, unchanged item is not processed
+        delattr(basket, "total")
+        basket.ensure_priced(request)
+        assert item_update.call_count == 2
+        assert basket.total == 54
+
+        # test update always prices the basket
+        basket.update(request)
+        assert basket.is_priced(request)
+
+
+@pytest.mark.django_db
+def test_basket_update_after_change(rf):
+    request = rf.get("/")
+    basket, _ = Basket.objects.get_or_create_from_request(request)
+    basket.add(Product.objects.create(name="Test", price=10), quantity=3)
+    basket.update(request)
+    assert basket.total == 27
+
+    # test item changes without invalidate are priced
+    item = basket.get_items()[0]
+    item.quantity = 5
+    item.save()
+    assert not basket.is_priced(request)
+    basket.update(request)
+    assert basket.total == 45
+    item.quantity = 4
+    basket.ensure_priced(request)
+    assert basket.total == 36
+
+    # test basket extra changes are priced
+    set_priced = Basket.set_priced
+    with mock.patch.object(Basket, "set_priced", autospec=True) as priced:
+        priced.side_effect = set_priced
+        basket.extra["test"] = 1
+        basket.ensure_priced(request)
+        basket.ensure_priced(request)
+        assert priced.call_count == 1
+        basket.update(request)
+        assert priced.call_count == 2
+
+
+@pytest.mark.django_db
+def test_basket_update_incremental(rf):
+    request = rf.get("/")
+    basket, _ = Basket.objects.get_or_create_from_request(request)
+    products = [Product.objects.create(name=f"Test {i}", price=60) for i in range(4)]
+    for product in products[:3]:
+        basket.add(product)
+
+    update = BasketItem.update
+    modifiers = [DiscountModifier(), SpecialTaxModifier()]
+    with (
+        mock.patch.object(basket_modifiers_pool, "_modifiers", modifiers),
+        mock.patch.object(basket_modifiers_pool, "_hooks", {}),
+        mock.patch.object(BasketItem, "update", autospec=True) as item_update,
+    ):
+        item_update.side_effect = update
+        basket.update(request)
+        assert item_update.call_count == 3
+
+        # test only changed items are processed, basket is processed again
+        basket.add(products[0])
+        basket.add(products[3])
+        basket.update(request)
+        assert item_update.call_count == 5
+        assert basket.subtotal == 312
+        item = basket.find(BasketItem.get_product_ref(products[0]))
+        assert item.total == 132  # special tax on item above 99
+        assert "special-tax" in item.extra_rows
+
+        # test item extra change
+        item.extra = {"test": 1}
+        item.save()
+        basket.invalidate()
+        basket.update(request)
+        assert item_update.call_count == 6
+
+        # test results are reused in a new request
+        basket = Basket.objects.get(id=basket.id)
+        basket.update(rf.get("/"))
+        assert item_update.call_count == 6
+        assert basket.subtotal == 312
+
+        # test product change processes all items
+        products[1].save()
+        basket.invalidate()
+        basket.update(request)
+        assert item_update.call_count == 10
+
+        # test modifiers that are not item local process all items
+        with mock.patch.object(SpecialTaxModifier, "item_local", False):
+            basket.invalidate()
+            basket.update(request)
+            assert item_update.call_count == 14
+
+
+@pytest.mark.django_db
+def test_basket_snapshot(rf, settings):
+    settings.SALESMAN_BASKET_SNAPSHOT = True
+    request = rf.get("/")
+    basket, _ = Basket.objects.get_or_create_from_request(request)
+    product = Product.objects.create(name="Test", price=30)
+    product_2 = Product.objects.create(name="Test 2", price=10)
+    basket.add(product, quantity=2)
+    basket.update(request)
+    assert basket.snapshot["fingerprint"] == basket.get_fingerprint(request)
+    total, extra_rows = basket.total, basket.extra_rows
+
+    # test snapshot is served without running modifiers
+    basket = Basket.objects.get(id=basket.id)
+    update = BasketItem.update
+    with mock.patch.object(BasketItem, "update", autospec=True) as item_update:
+        item_update.side_effect = update
+        basket.update(rf.get("/"))
+        assert item_update.call_count == 0
+        assert basket.total == total
+        assert basket.subtotal == 60
+        assert basket.get_items()[0].total == 60
+        assert basket.extra_rows["discount"].data == extra_rows["discount"].data
+
+        # test product change invalidates the snapshot
+        product.price = 10
+        product.save()
+        basket = Basket.objects.get(id=basket.id)
+        basket.update(rf.get("/"))
+        assert item_update.call_count == 1
+        assert basket.subtotal == 20
+
+        # test basket extra change invalidates the snapshot, items are not processed
+        basket.extra = {"test": 1}
+        basket.save()
+        basket.invalidate()
+        basket.update(rf.get("/"))
+        assert item_update.call_count == 1
+        assert basket.snapshot["fingerprint"] == basket.get_fingerprint(request)
+
+        # test unchanged item results are read from the snapshot
+        basket = Basket.objects.get(id=basket.id)
+        basket.add(product_2)
+        basket.update(rf.get("/"))
+        assert item_update.call_count == 2
+        assert basket.subtotal == 30
+
+
+@pytest.mark.django_db
+def test_basket_pricing_cache(rf, settings):
+    settings.SALESMAN_BASKET_PRICING_CACHE = True
+    product = Product.objects.create(name="Test", price=30)
+    product_2 = Product.objects.create(name="Test 2", price=10)
+    basket = Basket.objects.create()
+    basket.add(product, quantity=2)
+    basket.add(product_2, ref="custom-ref")
+    basket.update(rf.get("/"))
+    assert basket.subtotal == 70
+
+    # test basket with the same contents reuses results
+    basket_2 = Basket.objects.create()
+    basket_2.add(product_2)
+    basket_2.add(product, quantity=2)
+    update = BasketItem.update
+    with mock.patch.object(BasketItem, "update", autospec=True) as item_update:
+        item_update.side_effect = update
+        basket_2.update(rf.get("/"))
+        assert item_update.call_count == 0
+        assert basket_2.subtotal == 70
+        assert basket_2.total == basket.total
+        assert basket_2.find(f"shopproduct-{product_2.id}").total == 10
+        assert basket_2.find(f"shopproduct-{product.id}").total == 60
+
+        # test different contents and product change are priced
+        basket_2.add(product_2)
+        basket_2.update(rf.get("/"))
+        assert item_update.call_count == 2
+        product.price = 20
+        product.save()
+        basket.invalidate()
+        basket.update(rf.get("/"))
+        assert item_update.call_count == 4
+        assert basket.subtotal == 50
+
+        # test modifier cache invalidation
+        basket.invalidate()
+        basket.update(rf.get("/"))
+        assert item_update.call_count == 4
+        basket_modifiers_pool.get_modifiers()[0].invalidate_cache()
+        basket.invalidate()
+        basket.update(rf.get("/"))
+        assert item_update.call_count == 6
+
+
+@pytest.mark.django_db
+def test_basket_get_items_batched(rf, django_assert_num_queries):
+    request = rf.get("/")
+    basket, _ = Basket.objects.get_or_create_from_request(request)
+    basket.add(Product.objects.create(name="Test", price=30))
+    for i in range(5):
+        phone = Phone.objects.create(name=f"Phone {i}", base_price=10)
+        basket.add(PhoneVariant.objects.create(phone=phone))
+
+    basket = Basket.objects.get(id=basket.id)
+    # items query and a query per product type, phone is selected with the variant
+    with django_assert_num_queries(3):
+        basket.update(request)
+    assert basket.subtotal == 80
+    assert basket.get_items()[1].product.phone.name == "Phone 0"
+
+
+@pytest.mark.django_db
+def test_basket_batch_prices(rf):
+    request = rf.get("/")
+    basket, _ = Basket.objects.get_or_create_from_request(request)
+    product = Product.objects.create(name="Test", price=30)
+    basket.add(product)
+    basket.add(product, ref="1-special")
+    basket.add(Product.objects.create(name="Test #2", price=20))
+    phone = Phone.objects.create(name="Phone", base_price=10)
+    basket.add(PhoneVariant.objects.create(phone=phone))
+
+    get_prices = Product.get_prices
+    with (
+        mock.patch.object(Product, "get_prices", side_effect=get_prices) as prices,
+        mock.patch.object(Product, "get_price") as price,
+    ):
+        basket.update(request)
+        prices.assert_called_once()
+        assert len(prices.call_args.args[0]) == 2
+        price.assert_not_called()
+    assert [item.unit_price for item in basket.get_items()] == [30, 30, 20, 10]
+    assert basket.subtotal == 90
+
+
 @pytest.mark.django_db
 def test_basket_item_manipulation(rf):
     request = rf.get("/")
@@ -96,6 +410,184 @@ def test_basket_item_manipulation(rf):
     assert basket.count == basket.quantity == 0
 
 
+@pytest.mark.django_db
+def test_basket_find(django_assert_num_queries):
+    basket = Basket.objects.create()
+    product = Product.objects.create(name="Test")
+    item = basket.add(product)
+    assert basket.find(item.ref) == item
+    assert basket.find("non-existant-ref") is None
+
+    # test lookup from cached items uses the ref index
+    basket.get_items()
+    with django_assert_num_queries(0):
+        assert basket.find(item.ref) is basket.get_items()[0]
+        assert basket.find("non-existant-ref") is None
+
+    # test index is cleared when items change
+    item_2 = basket.add(product, ref="custom")
+    basket.get_items()
+    assert basket.find(item_2.ref) == item_2
+    basket.remove(item.ref)
+    basket.get_items()
+    assert basket.find(item.ref) is None
+
+
+@pytest.mark.django_db
+def test_basket_add_upsert(rf, django_assert_num_queries):
+    basket = Basket.objects.create()
+    product = Product.objects.create(name="Test")
+    ContentType.objects.get_for_model(product)
+    # upsert and totals update in a savepoint
+    with django_assert_num_queries(4):
+        item = basket.add(product, extra={"test": 1})
+    assert item.pk and item.quantity == 1 and item.product == product
+    assert basket.count == 1 and basket.quantity == 1
+    with django_assert_num_queries(4):
+        item = basket.add(product, quantity=2)
+    assert item.quantity == 3
+    assert item.extra == {"test": 1}
+    item = basket.add(product, extra={"test": 2})
+    assert item.quantity == 4
+    assert item.extra == {"test": 2}
+    assert BasketItem.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_basket_add_save_hooks():
+    basket = Basket.objects.create()
+    product = Product.objects.create(name="Test")
+    assert not BasketItem.has_save_hooks()
+
+    # test new items are saved with `save()` when receivers are connected
+    receiver = mock.Mock()
+    post_save.connect(receiver, sender=BasketItem)
+    try:
+        assert BasketItem.has_save_hooks()
+        item = basket.add(product)
+        basket.add(product, ref="other")
+    finally:
+        post_save.disconnect(receiver, sender=BasketItem)
+    assert receiver.call_count == 2
+    assert receiver.call_args_list[0].kwargs["instance"] == item
+    assert receiver.call_args_list[0].kwargs["created"]
+    assert basket.count == 2
+
+
+@pytest.mark.django_db
+def test_basket_totals(django_assert_num_queries):
+    basket = Basket.objects.create()
+    other = Basket.objects.create()
+    product = Product.objects.create(name="Test")
+
+    def assert_totals(count, quantity):
+        obj = Basket.objects.get(pk=basket.pk)
+        with django_assert_num_queries(0):
+            assert obj.count == count and obj.quantity == quantity
+
+    item = basket.add(product, quantity=2)
+    assert_totals(1, 2)
+    basket.bulk_add([{"product": product}, {"product": product, "ref": "other"}])
+    assert_totals(2, 4)
+    item.refresh_from_db()
+    item.quantity = 5
+    item.save()
+    assert_totals(2, 6)
+    basket.remove(item.ref)
+    assert_totals(1, 1)
+    other.add(product, quantity=3)
+    basket.merge(other)
+    assert_totals(2, 4)
+    basket.clear()
+    assert_totals(0, 0)
+
+    # test totals are not overwritten by a stale instance
+    stale = Basket.objects.get(pk=basket.pk)
+    basket.add(product)
+    stale.extra = {"test": 1}
+    stale.save()
+    assert_totals(1, 1)
+
+
+@pytest.mark.django_db
+def test_basket_add_fallback(rf):
+    basket = Basket.objects.create()
+    product = Product.objects.create(name="Test")
+    features = connection.features
+    with mock.patch.object(features, "supports_update_conflicts_with_target", False):
+        item = basket.add(product, extra={"test": 1})
+        assert item.pk and item.quantity == 1
+        item = basket.add(product, quantity=2)
+        assert item.quantity == 3
+        assert item.extra == {"test": 1}
+
+        # test item created concurrently, update is retried
+        calls = []
+
+        def update(queryset, **kwargs):
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else real_update(queryset, **kwargs)
+
+        real_update = QuerySet.update
+        with mock.patch.object(QuerySet, "update", autospec=True) as mocked:
+            mocked.side_effect = update
+            item = basket.add(product)
+        assert item.quantity == 4
+        assert len(calls) == 3  # retried update and totals update
+    assert BasketItem.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_basket_bulk_add(rf):
+    basket = Basket.objects.create()
+    product = Product.objects.create(name="Test")
+    product_2 = Product.objects.create(name="Test 2")
+    basket.add(product)
+    items = basket.bulk_add(
+        [
+            {"product": product, "quantity": 2, "extra": {"test": 1}},
+            {"product": product_2, "ref": "custom"},
+            {"product": product_2, "ref": "custom", "quantity": 3},
+        ]
+    )
+    assert [(i.ref, i.quantity) for i in items] == [
+        (f"shopproduct-{product.id}", 3),
+        ("custom", 4),
+    ]
+    assert basket.find(f"shopproduct-{product.id}").extra == {"test": 1}
+    assert basket.count == 2 and basket.quantity == 7
+
+    # test items are saved one by one when item saves run custom code
+    saved = []
+
+    def receiver(sender, instance, **kwargs):
+        saved.append(instance.ref)
+
+    post_save.connect(receiver, sender=BasketItem)
+    try:
+        basket.bulk_add([{"product": product}, {"product": product, "ref": "new"}])
+    finally:
+        post_save.disconnect(receiver, sender=BasketItem)
+    assert saved == [f"shopproduct-{product.id}", "new"]
+    assert basket.count == 3 and basket.quantity == 9
+
+    # test failed insert of an item created concurrently is retried
+    bulk_create = BasketItem.objects.bulk_create
+
+    def create_concurrently(items):
+        if mocked.call_count == 1:
+            raise IntegrityError
+        return bulk_create(items)
+
+    with mock.patch.object(
+        BasketItem.objects, "bulk_create", side_effect=create_concurrently
+    ) as mocked:
+        items = basket.bulk_add([{"product": product, "ref": "race", "quantity": 3}])
+    assert mocked.call_count == 2
+    assert [(i.ref, i.quantity) for i in items] == [("race", 3)]
+    assert basket.count == 4 and basket.quantity == 12
+
+
 @pytest.mark.django_db
 def test_basket_merge(rf):
     request = rf.get("/")
@@ -111,6 +603,25 @@ def test_basket_merge(rf):
     assert Basket.objects.count() == 1
     assert basket.count == 2
     assert basket.quantity == 3
+    assert basket.find(BasketItem.get_product_ref(product)).quantity == 2
+
+
+@pytest.mark.django_db
+def test_basket_merge_queries(rf):
+    def merge(num_items):
+        basket, other = Basket.objects.create(), Basket.objects.create()
+        for i in range(num_items):
+            product = Product.objects.create(name=f"Test {i}")
+            basket.add(product, quantity=2)
+            other.add(product)
+            other.add(product, ref=f"{i}-other")
+        with CaptureQueriesContext(connection) as context:
+            basket.merge(other)
+        assert basket.count == num_items * 2
+        assert basket.quantity == num_items * 4
+        return len(context.captured_queries)
+
+    assert merge(1) == merge(10)
 
 
 @pytest.mark.django_db
@@ -171,3 +682,130 @@ def test_basket_item_protect(rf):
             phone.delete()
     basket.remove(item.ref)
     product.delete()
+
+
+@pytest.mark.django_db
+def test_purge_baskets_command(django_user_model):
+    product = Product.objects.create(name="Test")
+    user = django_user_model.objects.create_user(username="user")
+    old = timezone.now() - timedelta(days=60)
+    stale = [Basket.objects.create() for _ in range(3)]
+    stale_user = Basket.objects.create(user=user)
+    fresh = Basket.objects.create()
+    for basket in stale + [stale_user, fresh]:
+        basket.add(product)
+    Basket.objects.exclude(pk=fresh.pk).update(date_updated=old)
+
+    # test dry run
+    out = StringIO()
+    call_command("salesman_purge_baskets", "--dry-run", stdout=out)
+    assert "Would delete 3 anonymous baskets." in out.getvalue()
+    assert Basket.objects.count() == 5
+
+    # test anonymous baskets are deleted in batches
+    out = StringIO()
+    call_command("salesman_purge_baskets", "--batch-size=2", "--sleep=0", stdout=out)
+    assert out.getvalue().count("Deleted") == 3
+    assert "Deleted 3 anonymous baskets." in out.getvalue()
+    assert set(Basket.objects.all()) == {stale_user, fresh}
+    assert BasketItem.objects.count() == 2
+
+    # test user baskets
+    call_command("salesman_purge_baskets", "--user-days=90", stdout=StringIO())
+    assert Basket.objects.count() == 2
+    call_command("salesman_purge_baskets", "--user-days=30", stdout=StringIO())
+    assert list(Basket.objects.all()) == [fresh]
+
+    # test item writes keep an old basket from being purged
+    Basket.objects.update(date_updated=old)
+    fresh.add(product, quantity=2)
+    call_command("salesman_purge_baskets", stdout=StringIO())
+    assert list(Basket.objects.all()) == [fresh]
+    assert fresh.items.get().quantity == 3
+    Basket.objects.update(date_updated=old)
+    item = fresh.items.get()
+    item.quantity = 1
+    item.save()
+    call_command("salesman_purge_baskets", stdout=StringIO())
+    assert list(Basket.objects.all()) == [fresh]
+
+    with pytest.raises(CommandError):
+        call_command("salesman_purge_baskets", "--batch-size=0")
+    with pytest.raises(CommandError):
+        call_command("salesman_purge_baskets", "--anonymous-days=-1")
+
+
+@pytest.mark.django_db
+def test_basket_async(rf, django_user_model):
+    request = rf.get("/")
+    request.session = SessionStore()
+    product = Product.objects.create(name="Test", price=10)
+    ContentType.objects.get_for_model(product)
+    native = mock.patch("salesman.basket.models.sync_to_async")
+
+    @async_to_sync
+    async def run():
+        with native as mocked:
+            basket, created = await Basket.objects.aget_or_create_from_request(
+                request, lazy=True
+            )
+            assert not created and basket.pk is None
+            basket, created = await Basket.objects.aget_or_create_from_request(request)
+            assert created and basket.pk
+            assert await request.session.aget(BASKET_ID_SESSION_KEY) == basket.pk
+            assert not mocked.called
+
+        item = await basket.aadd(product, quantity=2)
+        assert item.quantity == 2
+        await basket.aadd(product, ref="other")
+        await basket.aupdate(request)
+        assert basket.total == 27  # 10% discount
+
+        # test reads are made with the async ORM
+        with native as mocked:
+            loaded, _ = await Basket.objects.aget_or_create_from_request(request)
+            assert loaded == basket
+            items = await loaded.aget_items()
+            assert [(x.ref, x.product) for x in items] == [
+                (item.ref, product),
+                ("other", product),
+            ]
+            await basket.aensure_priced(request)
+            assert not mocked.called
+
+        # test removals update totals, failed removals are rolled back
+        await basket.aremove("other")
+        assert [x.ref for x in await basket.aget_items()] == [item.ref]
+        await basket.arefresh_from_db()
+        assert basket.count == 1 and basket.quantity == 2
+        with mock.patch.object(Basket, "update_totals", side_effect=DatabaseError):
+            with pytest.raises(DatabaseError):
+                await basket.aremove(item.ref)
+            with pytest.raises(DatabaseError):
+                await basket.aclear()
+        assert await basket.items.acount() == 1
+        await basket.aclear()
+        assert await basket.aget_items() == []
+        await basket.arefresh_from_db()
+        assert basket.count == 0 and basket.quantity == 0
+
+        other = await Basket.objects.acreate()
+        await other.aadd(product)
+        await basket.amerge(other)
+        assert [x.quantity for x in await basket.aget_items()] == [1]
+
+        # test session basket is merged into the user basket
+        request.user = await django_user_model.objects.acreate(username="user")
+        user_basket, created = await Basket.objects.aget_or_create_from_request(
+            request, lazy=True
+        )
+        assert created and user_basket.user_id == request.user.id
+        assert [x.quantity for x in await user_basket.aget_items()] == [1]
+        assert not await Basket.objects.filter(pk=basket.pk).aexists()
+        assert not await request.session.ahas_key(BASKET_ID_SESSION_KEY)
+        with native as mocked:
+            loaded, _ = await Basket.objects.aget_or_create_from_request(request)
+            assert loaded == user_basket
+            assert not mocked.called
+
+    run()
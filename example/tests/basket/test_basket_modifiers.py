@@ -1,7 +1,18 @@
+import threading
+from decimal import Decimal
+from unittest import mock
+
 import pytest
 from django.core.exceptions import ImproperlyConfigured
 
-from salesman.basket.modifiers import BasketModifier, BasketModifiersPool
+from salesman.basket.columns import ItemColumns
+from salesman.basket.models import ExtraRow
+from salesman.basket.modifiers import (
+    BasketModifier,
+    BasketModifiersPool,
+    basket_modifiers_pool,
+)
+from salesman.basket.serializers import ExtraRowSerializer, ExtraRowsField
 from salesman.conf import app_settings
 from salesman.core.utils import get_salesman_model
 from shop.models import Product
@@ -22,6 +33,104 @@ class DuplicateIdentifierModifier(BasketModifier):
     identifier = "dummy"
 
 
+class SlowModifier(BasketModifier):
+    identifier = "slow"
+    concurrent = True
+    prefetch_timeout = 1
+
+    # Concurrent modifiers must all reach the barrier for their prefetch to pass.
+    barrier = threading.Barrier(2)
+
+    def prefetch(self, basket, request):
+        self.barrier.wait(timeout=self.prefetch_timeout)
+        return self.identifier
+
+    def prefetch_fallback(self, basket, request, error):
+        return type(error).__name__
+
+    def process_basket(self, basket, request):
+        label = basket.prefetched[self.identifier]
+        self.add_extra_row(basket, request, label, 1)
+
+
+class SlowModifier2(SlowModifier):
+    identifier = "slow-2"
+
+
+class TimeoutModifier(SlowModifier):
+    identifier = "timeout"
+    prefetch_timeout = 0.05
+    released = threading.Event()
+
+    def prefetch(self, basket, request):
+        self.released.wait(timeout=1)
+        return self.identifier
+
+
+class FailingModifier(SlowModifier):
+    identifier = "failing"
+    concurrent = False
+
+    def prefetch(self, basket, request):
+        raise ValueError
+
+
+class RaisingModifier(BasketModifier):
+    identifier = "raising"
+    concurrent = True
+
+    def prefetch(self, basket, request):
+        raise ValueError
+
+
+class CachedModifier(BasketModifier):
+    identifier = "cached"
+    calls = 0
+
+    def get_cache_key(self, obj, request):
+        if isinstance(obj, Basket):
+            return request.GET.get("country", None)
+        return f"{obj.product_id}:{obj.quantity}"
+
+    def process_item(self, item, request):
+        type(self).calls += 1
+        self.add_extra_row(item, request, "Item fee", 1)
+
+    def process_basket(self, basket, request):
+        type(self).calls += 1
+        self.add_extra_row(basket, request, "Shipping", 5, identifier="shipping")
+        self.add_extra_row(basket, request, "Info", 10, charge=False)
+
+
+class SetupModifier(BasketModifier):
+    identifier = "setup"
+
+    def setup_item(self, item, request):
+        pass
+
+    def finalize_basket(self, basket, request):
+        pass
+
+
+class ColumnModifier(BasketModifier):
+    identifier = "column"
+
+    def process_item(self, item, request):
+        raise AssertionError("process_items is used instead")
+
+    def process_items(self, columns, request):
+        mask = columns.mask(lambda item: item.quantity > 1)
+        amounts = [total / -10 for total in columns.total]
+        self.add_column_rows(columns, request, "Bulk discount", amounts, mask=mask)
+
+
+class ItemFeeModifier(BasketModifier):
+    identifier = "item-fee"
+
+    def process_item(self, item, request):
+        self.add_extra_row(item, request, "Item fee", item.total / 100)
+
+
 @pytest.mark.django_db
 def test_modifier_add_extra_row(rf):
     request = rf.get("/")
@@ -35,12 +144,36 @@ def test_modifier_add_extra_row(rf):
     modifier.add_extra_row(item, request, label="Item label", amount=10.5, charge=False)
     assert item.total == 30
     modifier.add_extra_row(basket, request, label="Label", amount=10, extra={"test": 1})
-    data = basket.extra_rows["dummy"].data
+    row = basket.extra_rows["dummy"]
+    assert isinstance(row, ExtraRow)
+    assert (row.label, row.amount, row.extra, row.charge) == (
+        "Label",
+        10,
+        {"test": 1},
+        True,
+    )
+    data = row.data
     assert data["label"] == "Label"
     assert data["amount"] == "10.00"
     assert data["extra"]["test"] == 1
     assert basket.total == 37
 
+    # test rows are rendered in the same format, including legacy serializer rows
+    basket.extra_rows["legacy"] = ExtraRowSerializer({"label": "Legacy", "amount": 1})
+    data = ExtraRowsField().to_representation(basket.extra_rows)
+    assert data[-2] == {
+        "label": "Label",
+        "amount": "10.00",
+        "extra": {"test": 1},
+        "modifier": "dummy",
+    }
+    assert data[-1] == {
+        "label": "Legacy",
+        "amount": "1.00",
+        "extra": {},
+        "modifier": "legacy",
+    }
+
 
 def test_basket_modifiers_pool(settings):
     base_modifiers = ["tests.basket.test_basket_modifiers.DummyModifier"]
@@ -60,3 +193,114 @@ def test_basket_modifiers_pool(settings):
         ]
         BasketModifiersPool().get_modifiers()
         del app_settings.SALESMAN_BASKET_MODIFIERS
+
+
+def test_basket_modifiers_pool_hooks():
+    pool = BasketModifiersPool()
+    dummy, setup = DummyModifier(), SetupModifier()
+    pool._modifiers = [dummy, setup]
+    assert pool.get_hooks("process_item") == []
+    assert pool.get_hooks("setup_basket", "setup_item") == [(None, setup.setup_item)]
+    assert pool.get_hooks("finalize_basket") == [(setup.finalize_basket,)]
+    assert pool.get_hooks("process_item") is pool.get_hooks("process_item")
+
+
+@pytest.mark.django_db
+def test_basket_modifiers_prefetch(rf):
+    request = rf.get("/")
+    basket = Basket.objects.create()
+    basket.add(Product.objects.create(name="Test", price=10))
+    modifiers = [SlowModifier(), FailingModifier(), SlowModifier2(), TimeoutModifier()]
+    with (
+        mock.patch.object(basket_modifiers_pool, "_modifiers", modifiers),
+        mock.patch.object(basket_modifiers_pool, "_hooks", {}),
+    ):
+        SlowModifier.barrier.reset()
+        TimeoutModifier.released.clear()
+        try:
+            basket.update(request)
+        finally:
+            TimeoutModifier.released.set()
+    assert basket.prefetched == {
+        "slow": "slow",
+        "failing": "ValueError",
+        "slow-2": "slow-2",
+        "timeout": "TimeoutError",
+    }
+    assert list(basket.extra_rows) == list(basket.prefetched)
+    assert basket.total == 14
+
+    # test error is raised by default
+    with mock.patch.object(basket_modifiers_pool, "_modifiers", [SetupModifier()]):
+        assert basket_modifiers_pool.prefetch(basket, request) == {}
+    modifier = RaisingModifier()
+    with mock.patch.object(basket_modifiers_pool, "_modifiers", [modifier]):
+        with pytest.raises(ValueError):
+            basket_modifiers_pool.prefetch(basket, request)
+
+
+@pytest.mark.django_db
+def test_basket_modifiers_cache(rf):
+    basket = Basket.objects.create()
+    basket.add(Product.objects.create(name="Test", price=10))
+    basket.add(Product.objects.create(name="Test 2", price=20))
+    CachedModifier.invalidate_cache()
+    CachedModifier.calls = 0
+    with (
+        mock.patch.object(basket_modifiers_pool, "_modifiers", [CachedModifier()]),
+        mock.patch.object(basket_modifiers_pool, "_hooks", {}),
+    ):
+        basket.update(rf.get("/?country=HR"))
+        assert CachedModifier.calls == 3
+        assert basket.total == 37
+        rows = ExtraRowsField().to_representation(basket.extra_rows)
+
+        # test rows are read from cache
+        basket.invalidate()
+        basket.update(rf.get("/?country=HR"))
+        assert CachedModifier.calls == 3
+        assert basket.total == 37
+        assert ExtraRowsField().to_representation(basket.extra_rows) == rows
+        assert basket.get_items()[0].total == 11
+
+        # test changed key and no key
+        basket.invalidate()
+        basket.update(rf.get("/?country=SI"))
+        assert CachedModifier.calls == 4
+        basket.invalidate()
+        basket.update(rf.get("/"))
+        basket.invalidate()
+        basket.update(rf.get("/"))
+        assert CachedModifier.calls == 6
+
+        # test invalidate cache
+        CachedModifier.invalidate_cache()
+        basket.invalidate()
+        basket.update(rf.get("/?country=HR"))
+        assert CachedModifier.calls == 9
+
+
+@pytest.mark.django_db
+def test_basket_modifiers_columns(rf):
+    basket = Basket.objects.create()
+    basket.add(Product.objects.create(name="Test", price=10), quantity=2)
+    basket.add(Product.objects.create(name="Test 2", price=20))
+    modifiers = [ColumnModifier(), ItemFeeModifier()]
+    with (
+        mock.patch.object(basket_modifiers_pool, "_modifiers", modifiers),
+        mock.patch.object(basket_modifiers_pool, "_hooks", {}),
+    ):
+        assert basket_modifiers_pool.has_column_hooks()
+        basket.update(rf.get("/"))
+        item_1, item_2 = basket.get_items()
+        assert list(item_1.extra_rows) == ["column", "item-fee"]
+        assert item_1.extra_rows["column"].amount == -2
+        assert item_1.extra_rows["item-fee"].amount == Decimal("0.18")
+        assert item_1.total == Decimal("18.18")
+        assert list(item_2.extra_rows) == ["item-fee"]
+        assert item_2.total == Decimal("20.2")
+        assert basket.subtotal == Decimal("38.38")
+
+        with pytest.raises(ValueError):
+            columns = ItemColumns(basket.get_items())
+            modifiers[0].add_column_rows(columns, None, "Invalid", [1])
@@ -0,0 +1,92 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+
+from salesman.basket.profiling import PricingProfile, modifier_stats
+from salesman.basket.signals import basket_priced
+from salesman.core.utils import get_salesman_cache, get_salesman_model
+from shop.models import Product
+
+Basket = get_salesman_model("Basket")
+
+
+@pytest.mark.django_db
+def test_basket_priced_signal(rf):
+    request = rf.get("/")
+    basket = Basket.objects.create()
+    basket.add(Product.objects.create(name="Test", price=10))
+    basket.add(Product.objects.create(name="Test 2", price=20))
+
+    received = []
+
+    def receiver(sender, basket, request, profile, **kwargs):
+        received.append(profile)
+
+    basket_priced.connect(receiver)
+    try:
+        basket.update(request)
+    finally:
+        basket_priced.disconnect(receiver)
+    assert len(received) == 1
+    entries = received[0].to_list()
+    assert [(x["modifier"], x["phase"], x["calls"], x["rows"]) for x in entries] == [
+        ("discount", "process_basket", 1, 1),
+    ]
+    assert entries[0]["time"] > 0
+
+    # test profiling is disabled without receivers
+    basket.invalidate()
+    basket.update(request)
+    assert len(received) == 1
+
+
+@pytest.mark.django_db
+def test_basket_modifier_stats(rf, settings):
+    settings.SALESMAN_BASKET_PROFILING = True
+    modifier_stats.reset()
+    basket = Basket.objects.create()
+    basket.add(Product.objects.create(name="Test", price=10))
+    for _ in range(3):
+        basket.invalidate()
+        basket.update(rf.get("/"))
+    stats = modifier_stats.get_stats()
+    assert len(stats) == 1
+    assert stats[0]["modifier"] == "discount"
+    assert stats[0]["calls"] == 3
+    assert stats[0]["rows"] == 3
+
+    # test stats are written with a single read and write
+    profile = PricingProfile()
+    profile.record("test", "process_item", 0.5, 2)
+    profile.record("test", "process_item", 0.25, 0)
+    cache = get_salesman_cache()
+    with (
+        mock.patch.object(cache, "get_many", wraps=cache.get_many) as get_many,
+        mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many,
+        mock.patch.object(cache, "incr") as incr,
+    ):
+        modifier_stats.record(profile)
+    assert get_many.call_count == set_many.call_count == 1
+    assert not incr.called
+    stats = modifier_stats.get_stats()
+    assert stats[1] == {
+        "modifier": "test",
+        "phase": "process_item",
+        "calls": 2,
+        "time": 0.75,
+        "rows": 2,
+    }
+
+    out = StringIO()
+    call_command("salesman_modifier_stats", "--reset", stdout=out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith("Modifier")
+    assert lines[1].split() == ["test", "process_item", "2", "750.00", "375.000", "2"]
+    assert lines[-1] == "Stats cleared."
+    assert modifier_stats.get_stats() == []
+
+    out = StringIO()
+    call_command("salesman_modifier_stats", stdout=out)
+    assert out.getvalue() == "No stats collected.\n"
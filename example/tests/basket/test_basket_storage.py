@@ -0,0 +1,154 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from salesman.basket.storage import (
+    BASKET_TOKEN_SESSION_KEY,
+    BaseBasketStorage,
+    CacheBasketStorage,
+    ModelBasketStorage,
+    get_basket_storage,
+)
+from salesman.conf import app_settings
+from salesman.core.utils import get_salesman_cache, get_salesman_model
+from shop.models import Product
+
+Basket = get_salesman_model("Basket")
+BasketItem = get_salesman_model("BasketItem")
+Order = get_salesman_model("Order")
+
+
+@pytest.fixture
+def cache_storage(settings):
+    settings.SALESMAN_BASKET_STORAGE = "salesman.basket.storage.CacheBasketStorage"
+    app_settings.__dict__.pop("SALESMAN_BASKET_STORAGE", None)
+    yield
+    get_salesman_cache().clear()
+    app_settings.__dict__.pop("SALESMAN_BASKET_STORAGE", None)
+
+
+def test_basket_storage_settings(rf, settings):
+    request = rf.get("/")
+    assert isinstance(get_basket_storage(request), ModelBasketStorage)
+    settings.SALESMAN_BASKET_STORAGE = "shop.models.Product"
+    app_settings.__dict__.pop("SALESMAN_BASKET_STORAGE", None)
+    with pytest.raises(ImproperlyConfigured):
+        app_settings.SALESMAN_BASKET_STORAGE
+    app_settings.__dict__.pop("SALESMAN_BASKET_STORAGE", None)
+
+    storage = BaseBasketStorage(request)
+    with pytest.raises(NotImplementedError):
+        storage.get()
+    with pytest.raises(NotImplementedError):
+        storage.save(Basket())
+    with pytest.raises(NotImplementedError):
+        storage.delete(Basket())
+
+
+@pytest.mark.django_db
+def test_basket_storage_cache(rf, django_user_model, cache_storage):
+    product = Product.objects.create(name="Test", price=10)
+    request = rf.get("/")
+    request.session = {}
+
+    # test basket is kept in cache
+    basket = CacheBasketStorage(request).get()
+    assert basket.in_storage
+    basket.add(product, quantity=2)
+    basket.add(product, extra={"test": 1})
+    basket.bulk_add([{"product": product, "ref": "other"}])
+    basket.extra = {"note": "Test"}
+    basket.save()
+    assert not Basket.objects.exists() and not BasketItem.objects.exists()
+    assert BASKET_TOKEN_SESSION_KEY in request.session
+
+    # test basket is loaded from cache
+    basket = CacheBasketStorage(request).get()
+    assert basket.in_storage and basket.extra == {"note": "Test"}
+    items = basket.get_items()
+    assert [(x.ref, x.quantity, x.extra) for x in items] == [
+        ("shopproduct-1", 3, {"test": 1}),
+        ("other", 1, {}),
+    ]
+    assert items[0].product == product
+    basket.update(request)
+    assert basket.total == 36  # 10% discount
+
+    # test item writes are saved to cache
+    items[0].quantity = 4
+    items[0].save()
+    items[1].delete()
+    basket = CacheBasketStorage(request).get()
+    assert [(x.ref, x.quantity) for x in basket.get_items()] == [("shopproduct-1", 4)]
+    assert not BasketItem.objects.exists()
+
+    # test basket is promoted to the database
+    basket.promote()
+    assert basket.pk and basket.count == 1 and not basket.in_storage
+    assert BasketItem.objects.get().quantity == 4
+    assert BASKET_TOKEN_SESSION_KEY not in request.session
+    assert CacheBasketStorage(request).get() == basket
+
+    # test basket is merged into the user basket on login
+    request = rf.get("/")
+    request.session = {}
+    basket = CacheBasketStorage(request).get()
+    basket.add(product)
+    request.user = django_user_model.objects.create_user(username="user")
+    basket = CacheBasketStorage(request).get()
+    assert basket.pk and basket.user == request.user
+    assert [(x.ref, x.quantity) for x in basket.get_items()] == [("shopproduct-1", 1)]
+    assert BASKET_TOKEN_SESSION_KEY not in request.session
+
+    # test clear and delete
+    request = rf.get("/")
+    request.session = {}
+    basket = CacheBasketStorage(request).get()
+    basket.add(product)
+    basket.clear()
+    assert CacheBasketStorage(request).get().count == 0
+    basket.add(product)
+    async_to_sync(basket.aclear)()
+    assert CacheBasketStorage(request).get().count == 0
+    basket.delete()
+    assert BASKET_TOKEN_SESSION_KEY not in request.session
+
+
+@pytest.mark.django_db
+def test_basket_storage_cache_views(cache_storage):
+    url = reverse("salesman-basket-list")
+    client = APIClient()
+    product = Product.objects.create(name="Test", price=10)
+
+    # test basket views don't write to the database
+    data = {"product_type": "shop.Product", "product_id": product.id}
+    response = client.post(url, data)
+    assert response.status_code == 201
+    item_url = reverse("salesman-basket-detail", args=[response.json()["ref"]])
+    response = client.put(item_url, {"quantity": 3})
+    assert response.status_code == 200
+    assert client.get(item_url).json()["quantity"] == 3
+    assert client.get(reverse("salesman-basket-detail", args=["x"])).status_code == 404
+
+    # test failed operations are discarded
+    operations = [{"op": "add", **data}, {"op": "update", "ref": "x"}]
+    response = client.patch(url, operations, format="json")
+    assert response.status_code == 400
+    assert client.get(url).json()["items"][0]["quantity"] == 3
+    assert not Basket.objects.exists()
+
+    # test basket is promoted at checkout
+    checkout_data = {
+        "email": "user@example.com",
+        "shipping_address": "Test",
+        "billing_address": "Test",
+        "payment_method": "dummy",
+    }
+    response = client.post(reverse("salesman-checkout-list"), checkout_data, "json")
+    assert response.status_code == 201
+    basket = Basket.objects.get()
+    assert basket.extra["email"] == "user@example.com"
+    assert BasketItem.objects.get(basket=basket).quantity == 3
+    assert client.delete(url).status_code == 204
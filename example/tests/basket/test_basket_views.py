@@ -1,3 +1,5 @@
+from unittest import mock
+
 import pytest
 from django.urls import reverse
 from rest_framework.settings import api_settings
@@ -7,6 +9,7 @@ from salesman.basket.views import BasketViewSet
 from salesman.core.utils import get_salesman_model
 from shop.models import Product
 
+Basket = get_salesman_model("Basket")
 BasketItem = get_salesman_model("BasketItem")
 
 
@@ -108,4 +111,220 @@ def test_basket_views():
     response = client.delete(url)
     assert response.status_code == 204
     response = client.get(url)
-    assert response.json()["id"] == basket_id + 1
+    assert response.json()["id"] is None  # new basket is saved with first write
+    assert not Basket.objects.filter(id=basket_id).exists()
+
+
+@pytest.mark.django_db
+def test_basket_views_single_pricing_pass():
+    url = reverse("salesman-basket-list")
+    client = APIClient()
+    for i in range(3):
+        product = Product.objects.create(name=f"Test {i}")
+        data = {"product_type": "shop.Product", "product_id": product.id}
+        client.post(url, data, format="json")
+
+    set_priced = Basket.set_priced
+    with mock.patch.object(Basket, "set_priced", autospec=True) as priced:
+        priced.side_effect = set_priced
+        response = client.get(url)
+        assert len(response.json()["items"]) == 3
+        assert priced.call_count == 1
+
+        # test `?basket` render after item update re-prices only once
+        priced.reset_mock()
+        ref = response.json()["items"][0]["ref"]
+        detail_url = reverse("salesman-basket-detail", args=[ref]) + "?basket"
+        response = client.put(detail_url, {"quantity": 2}, format="json")
+        assert response.json()["items"][0]["quantity"] == 2
+        assert priced.call_count == 1
+
+
+@pytest.mark.django_db
+def test_basket_views_bulk(django_assert_max_num_queries):
+    url = reverse("salesman-basket-bulk")
+    client = APIClient()
+    products = [Product.objects.create(name=f"Test {i}", price=10) for i in range(3)]
+    data = [
+        {"product_type": "shop.Product", "product_id": p.id, "quantity": 2}
+        for p in products
+    ]
+    data.append({"product_type": "shop.Product", "product_id": products[0].id})
+    with django_assert_max_num_queries(15):
+        response = client.post(url, data, format="json")
+    assert response.status_code == 201
+    items = response.json()["items"]
+    assert [i["quantity"] for i in items] == [3, 2, 2]
+    assert response.json()["subtotal"] == "70.00"
+
+    # test existing items are updated
+    response = client.post(url, data[:1], format="json")
+    assert response.json()["items"][0]["quantity"] == 5
+    assert BasketItem.objects.count() == 3
+
+    # test validation errors
+    data = [
+        {"product_type": "shop.Product", "product_id": products[0].id},
+        {"product_type": "shop.Product", "product_id": 999},
+    ]
+    response = client.post(url, data, format="json")
+    assert response.status_code == 400
+    assert "non_field_errors" in response.json()["1"]
+    response = client.post(url, {"product_id": 1}, format="json")
+    assert response.status_code == 400
+    assert BasketItem.objects.get(ref=f"shopproduct-{products[0].id}").quantity == 5
+
+
+@pytest.mark.django_db
+def test_basket_views_quote(django_assert_max_num_queries):
+    url = reverse("salesman-basket-quote")
+    client = APIClient()
+    products = [Product.objects.create(name=f"Test {i}", price=10) for i in range(2)]
+    data = {
+        "items": [
+            {"product_type": "shop.Product", "product_id": products[0].id},
+            {"product_type": "shop.Product", "product_id": products[1].id},
+            {"product_type": "shop.Product", "product_id": products[0].id},
+        ],
+        "extra": {"note": "Test"},
+    }
+    with django_assert_max_num_queries(2):
+        response = client.post(url, data, format="json")
+    assert response.status_code == 200
+    assert "id" not in response.json()
+    items = response.json()["items"]
+    assert [i["quantity"] for i in items] == [2, 1]
+    assert "url" not in items[0]
+    assert response.json()["subtotal"] == "30.00"
+    assert response.json()["total"] == "27.00"
+    assert response.json()["extra"] == {"note": "Test"}
+    assert not Basket.objects.exists()
+    assert not BasketItem.objects.exists()
+
+    # test `?basket` doesn't render the quoted basket again
+    with mock.patch.object(
+        BasketViewSet,
+        "get_basket_response",
+        autospec=True,
+        side_effect=BasketViewSet.get_basket_response,
+    ) as basket_response:
+        response = client.post(url + "?basket", data, format="json")
+    assert not basket_response.called
+    assert response.status_code == 200
+    assert response.json()["total"] == "27.00"
+    assert len(response.json()["items"]) == 2
+    assert not Basket.objects.exists()
+
+    # test validation errors
+    data["items"].append({"product_type": "shop.Product", "product_id": 999})
+    response = client.post(url, data, format="json")
+    assert response.status_code == 400
+    assert "non_field_errors" in response.json()["items"]["3"]
+
+
+@pytest.mark.django_db
+def test_basket_views_operations():
+    url = reverse("salesman-basket-list")
+    client = APIClient()
+    product = Product.objects.create(name="Test", price=10)
+    product_2 = Product.objects.create(name="Test 2", price=20)
+    ref = f"shopproduct-{product.id}"
+    client.post(url, {"product_type": "shop.Product", "product_id": product.id})
+
+    data = [
+        {"op": "add", "product_type": "shop.Product", "product_id": product_2.id},
+        {"op": "update", "ref": ref, "quantity": 3, "extra": {"test": 1}},
+        {"op": "remove", "ref": f"shopproduct-{product_2.id}"},
+        {"op": "add", "product_type": "shop.Product", "product_id": product_2.id},
+        {"op": "extra", "extra": {"test": 2}},
+    ]
+    update = BasketItem.update
+    with mock.patch.object(BasketItem, "update", autospec=True) as item_update:
+        item_update.side_effect = update
+        response = client.patch(url, data, format="json")
+        assert item_update.call_count == 2
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [(i["quantity"], i["extra"]) for i in items] == [(3, {"test": 1}), (1, {})]
+    assert response.json()["extra"] == {"test": 2}
+
+    # test failed operation rolls back all changes
+    data = [
+        {"op": "remove", "ref": ref},
+        {"op": "extra", "extra": {"test": 3}},
+        {"op": "update", "ref": "non-existant-ref", "quantity": 2},
+    ]
+    response = client.patch(url, data, format="json")
+    assert response.status_code == 400
+    assert "ref" in response.json()["2"]
+    response = client.patch(url, [{"op": "update", "quantity": 0}], format="json")
+    assert response.status_code == 400
+    response = client.patch(
+        url, [{"op": "update", "ref": ref, "quantity": 0}], format="json"
+    )
+    assert "quantity" in response.json()["0"]
+    response = client.get(url)
+    assert len(response.json()["items"]) == 2
+    assert response.json()["extra"] == {"test": 2}
+
+
+@pytest.mark.django_db
+def test_basket_views_operations_new_basket():
+    url = reverse("salesman-basket-list")
+    client = APIClient()
+    product = Product.objects.create(name="Test", price=10)
+
+    # test failed operations on a new basket roll back the basket
+    data = [
+        {"op": "add", "product_type": "shop.Product", "product_id": product.id},
+        {"op": "add", "product_type": "shop.Product", "product_id": 999},
+    ]
+    response = client.patch(url + "?basket", data, format="json")
+    assert response.status_code == 400
+    assert "1" in response.json()
+    assert not Basket.objects.exists()
+    assert "BASKET_ID" not in client.session
+    assert client.get(url).json()["items"] == []
+
+    # test basket is saved with the next write
+    response = client.patch(url, data[:1], format="json")
+    assert response.status_code == 200
+    basket = Basket.objects.get()
+    assert client.session["BASKET_ID"] == basket.id
+    assert basket.count == 1
+
+
+@pytest.mark.django_db
+def test_basket_views_explain(settings, django_user_model):
+    settings.SALESMAN_BASKET_SNAPSHOT = True
+    url = reverse("salesman-basket-list")
+    client = APIClient()
+    user = django_user_model.objects.create_user(username="user", password="pass")
+    client.force_authenticate(user)
+    product = Product.objects.create(name="Test", price=100)
+    client.post(url, {"product_type": "shop.Product", "product_id": product.id})
+
+    # test explain is only available to staff
+    response = client.get(url + "?explain")
+    assert "explain" not in response.json()
+
+    user.is_staff = True
+    user.save()
+    response = client.get(url + "?explain")
+    explain = response.json()["explain"]
+    assert explain["total"] == "90.00"
+    assert explain["modifiers"] == [
+        {
+            "modifier": "discount",
+            "phase": "process_basket",
+            "calls": 1,
+            "time": mock.ANY,
+            "rows": 1,
+            "queries": 0,
+            "total": "90.00",
+        }
+    ]
+    response = client.get(reverse("salesman-basket-count") + "?explain")
+    assert response.json()["explain"]["modifiers"][0]["modifier"] == "discount"
+    response = client.get(reverse("salesman-checkout-list") + "?explain")
+    assert response.json()["explain"]["total"] == "90.00"
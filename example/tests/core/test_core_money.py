@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from salesman.basket.utils import get_modifier_cache_key
+from salesman.conf import app_settings
+from salesman.core import money
+from shop.models import Product
+from shop.models.basket import Basket
+from shop.models.order import Order
+
+
+@pytest.fixture
+def precision(settings):
+    def set_precision(value, rounding="ROUND_HALF_UP"):
+        settings.SALESMAN_PRICE_PRECISION = value
+        settings.SALESMAN_PRICE_ROUNDING = rounding
+        app_settings.__dict__.pop("SALESMAN_PRICE_PRECISION", None)
+        app_settings.__dict__.pop("SALESMAN_PRICE_ROUNDING", None)
+
+    yield set_precision
+    app_settings.__dict__.pop("SALESMAN_PRICE_PRECISION", None)
+    app_settings.__dict__.pop("SALESMAN_PRICE_ROUNDING", None)
+
+
+def test_money_decimal():
+    assert money.to_amount("10.5") == Decimal("10.5")
+    assert money.coerce_amount(3) == Decimal(3)
+    assert money.to_decimal(Decimal("1.25")) == Decimal("1.25")
+    assert money.to_decimal(10) == Decimal(10)
+
+
+def test_money_minor_units(precision):
+    precision(2)
+    assert money.to_amount("10.5") == 1050
+    assert money.to_amount(0.1) == 10
+    assert money.to_amount(Decimal("0.125")) == 13
+    assert money.coerce_amount(1050) == 1050
+    assert money.coerce_amount(1050 / -10) == -105
+    assert money.coerce_amount(12.5) == 13
+    assert money.coerce_amount(-12.5) == -13
+    assert money.to_decimal(1050) == Decimal("10.50")
+    assert money.to_decimal(Decimal("1.5")) == Decimal("1.5")
+
+    precision(2, "ROUND_HALF_EVEN")
+    assert money.to_amount(Decimal("0.125")) == 12
+    assert money.coerce_amount(12.5) == 12
+
+    precision(0)
+    assert money.to_amount("10.5") == 11
+    assert money.to_decimal(11) == Decimal(11)
+
+
+def test_money_settings(precision):
+    for value in [-1, True, "2"]:
+        precision(value)
+        with pytest.raises(ImproperlyConfigured, match="non-negative"):
+            app_settings.SALESMAN_PRICE_PRECISION
+    precision(0)
+    assert app_settings.SALESMAN_PRICE_PRECISION == 0
+    precision(2, "HALF_UP")
+    with pytest.raises(ImproperlyConfigured):
+        app_settings.SALESMAN_PRICE_ROUNDING
+
+
+def test_money_modifier_cache_key(precision):
+    key = get_modifier_cache_key("test", "process_basket", "key")
+    assert get_modifier_cache_key("test", "process_basket", "key") == key
+    precision(2)
+    assert get_modifier_cache_key("test", "process_basket", "key") != key
+
+
+@pytest.mark.django_db
+def test_money_basket_pricing(rf, precision):
+    precision(2)
+    request = rf.get("/")
+    basket, _ = Basket.objects.get_or_create_from_request(request)
+    basket.add(Product.objects.create(name="Test", price="3.33"), quantity=3)
+    basket.update(request)
+    assert basket.subtotal == 999
+    assert basket.extra_rows["discount"].amount == -100  # rounded from -99.9
+    assert basket.total == 899
+
+    order = Order()
+    order.populate_from_basket(basket, request)
+    assert order.subtotal == Decimal("9.99")
+    assert order.total == Decimal("8.99")
+    assert order.extra_rows[0]["amount"] == "-1.00"
@@ -1,6 +1,8 @@
 from decimal import Decimal
+from unittest import mock
 
 import pytest
+from asgiref.sync import async_to_sync
 
 from salesman.admin.wagtail.mixins import WagtailOrderAdminMixin
 from salesman.basket.serializers import ExtraRowsField
@@ -46,6 +48,19 @@ def test_create_and_populate_from_basket(rf):
     assert order.extra_rows == ExtraRowsField().to_representation(extra_rows)
 
     assert len(order.extra_rows) == len(extra_rows)
+
+    # Test request is passed to extra rows field context
+    with mock.patch.object(
+        ExtraRowsField,
+        "to_representation",
+        autospec=True,
+        side_effect=ExtraRowsField.to_representation,
+    ) as to_representation:
+        Order.objects.create_from_basket(basket, request)
+    assert to_representation.call_count == 1 + basket.count
+    for call in to_representation.call_args_list:
+        assert call.args[0].context == {"request": request}
+
     # Test populate with kwargs
     order2 = Order.objects.create_from_request(request)
     order2.populate_from_basket(basket, request, status=order2.Status.COMPLETED)
@@ -137,6 +152,25 @@ def test_order_item_properties(rf):
     assert "test" in item.extra
 
 
+@pytest.mark.django_db
+def test_order_async(rf):
+    request = rf.get("/")
+    basket = Basket.objects.create()
+    basket.add(Product.objects.create(name="Test", price=100))
+
+    @async_to_sync
+    async def run():
+        order = await Order.objects.acreate_from_basket(basket, request)
+        assert order.pk and order.total == Decimal(90)
+        payment = await order.apay(Decimal(50), "test_id", payment_method="dummy")
+        assert payment.order == order and payment.pk
+        return order
+
+    order = run()
+    assert order.items.count() == 1
+    assert order.amount_paid == Decimal(50)
+
+
 @pytest.mark.django_db
 def test_order_payment():
     # test str
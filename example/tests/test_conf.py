@@ -5,7 +5,7 @@ from salesman.basket.modifiers import BasketModifier
 from salesman.checkout.payment import PaymentMethod
 from salesman.conf import app_settings
 from salesman.orders.status import BaseOrderStatus
-from shop.models import InvalidProduct
+from shop.models import InvalidProduct, PhoneVariant
 
 
 def test_app_settings():
@@ -47,6 +47,40 @@ def test_product_types(settings):
         del app_settings.SALESMAN_PRODUCT_TYPES
 
 
+def order_by_price(queryset):
+    return queryset.order_by("price")
+
+
+@pytest.mark.django_db
+def test_product_querysets(settings):
+    app_settings.__dict__.pop("SALESMAN_PRODUCT_QUERYSETS", None)
+    settings.SALESMAN_PRODUCT_TYPES = {
+        "shop.Product": "shop.serializers.ProductSerializer",
+        "shop.PhoneVariant": {
+            "serializer": "shop.serializers.PhoneVariantSerializer",
+            "select_related": ["phone"],
+            "only": ["id", "price", "phone__base_price"],
+            "queryset": "tests.test_conf.order_by_price",
+        },
+    }
+    assert "shop.PhoneVariant" in app_settings.SALESMAN_PRODUCT_TYPES
+    querysets = app_settings.SALESMAN_PRODUCT_QUERYSETS
+    assert list(querysets) == ["shop.PhoneVariant"]
+    queryset = querysets["shop.PhoneVariant"](PhoneVariant.objects.all())
+    assert queryset.query.select_related == {"phone": {}}
+    assert queryset.query.order_by == ("price",)
+    del app_settings.SALESMAN_PRODUCT_TYPES
+    del app_settings.SALESMAN_PRODUCT_QUERYSETS
+    with pytest.raises(ImproperlyConfigured):
+        settings.SALESMAN_PRODUCT_TYPES = {
+            "shop.Product": {
+                "serializer": "shop.serializers.ProductSerializer",
+                "queryset": "shop.serializers.ProductSerializer",
+            }
+        }
+        assert app_settings.SALESMAN_PRODUCT_QUERYSETS
+
+
 class InvalidModifier:
     pass
 
@@ -2,7 +2,7 @@ from typing import Any
 
 from django.apps import AppConfig, apps
 from django.db.models.deletion import ProtectedError
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.utils.translation import gettext_lazy as _
 
 from salesman.conf import app_settings
@@ -26,6 +26,15 @@ def protect_basket_items(sender: Any, instance: Product, **kwargs: Any) -> None:
         raise ProtectedError(msg, items)
 
 
+def invalidate_basket_snapshots(sender: Any, **kwargs: Any) -> None:
+    """
+    Bump product version to invalidate stored basket snapshots.
+    """
+    from .utils import bump_product_version
+
+    bump_product_version(sender._meta.label)
+
+
 class SalesmanBasketApp(AppConfig):
     name = "salesman.basket"
     label = "salesmanbasket"
@@ -37,3 +46,9 @@ class SalesmanBasketApp(AppConfig):
             app_label, model_name = key.split(".")
             model = apps.get_model(app_label, model_name)
             pre_delete.connect(protect_basket_items, sender=model, dispatch_uid=key)
+            post_save.connect(
+                invalidate_basket_snapshots, sender=model, dispatch_uid=key
+            )
+            post_delete.connect(
+                invalidate_basket_snapshots, sender=model, dispatch_uid=key
+            )
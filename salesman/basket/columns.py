@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Sequence
+
+from salesman.core.money import Amount, coerce_amount
+
+from .models import ExtraRow
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .models import BaseBasketItem
+
+
+class ItemColumns:
+    """
+    Basket item values stored as columns, one list per value with an entry for
+    each item. Passed to ``BasketModifier.process_items`` so that modifiers
+    can process all items at once instead of calling ``process_item`` per item.
+
+    Values are written back to the items with ``flush()``.
+    """
+
+    def __init__(self, items: list[BaseBasketItem]) -> None:
+        self.items = items
+        self.quantity: list[int] = [item.quantity for item in items]
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def refresh(self) -> None:
+        """
+        Read prices from the items, eg. after they were processed per item.
+        """
+        self.unit_price: list[Amount] = [item.unit_price for item in self.items]
+        self.subtotal: list[Amount] = [item.subtotal for item in self.items]
+        self.total: list[Amount] = [item.total for item in self.items]
+        # Extra rows added since the last flush, as tuples of
+        # ``(identifier, label, amounts, extra, charge)``.
+        self.extra_rows: list[tuple[str, str, list[Any], dict[str, Any], bool]] = []
+
+    def flush(self) -> None:
+        """
+        Write prices and added extra rows to the items.
+        """
+        for i, item in enumerate(self.items):
+            item.unit_price = self.unit_price[i]
+            item.subtotal = self.subtotal[i]
+            item.total = self.total[i]
+        for identifier, label, amounts, extra, charge in self.extra_rows:
+            for item, amount in zip(self.items, amounts):
+                if amount is not None:
+                    item.extra_rows[identifier] = ExtraRow(label, amount, extra, charge)
+        self.extra_rows = []
+
+    def mask(self, predicate: Callable[[BaseBasketItem], bool]) -> list[bool]:
+        """
+        Returns a list with ``predicate`` result for each item.
+
+        Args:
+            predicate (Callable): Function that receives an item
+
+        Returns:
+            list[bool]: Item mask
+        """
+        return [bool(predicate(item)) for item in self.items]
+
+    def add_rows(
+        self,
+        identifier: str,
+        label: str,
+        amounts: Sequence[Any],
+        mask: Sequence[bool] | None = None,
+        extra: dict[str, Any] = {},
+        charge: bool = True,
+    ) -> None:
+        """
+        Add extra row to each item with amount from ``amounts``. Items where
+        ``mask`` is False or amount is None are skipped.
+
+        Args:
+            identifier (str): Extra row ID
+            label (str): Row label
+            amounts (Sequence): Row amount for each item
+            mask (Sequence[bool], optional): Items to add the row to. Defaults to all.
+            extra (dict, optional): Row extra data. Defaults to {}.
+            charge (bool, optional): Whether to charge the amount. Defaults to True.
+        """
+        if len(amounts) != len(self.items):
+            raise ValueError("Number of amounts must match the number of items.")
+        if mask is None:
+            mask = [True] * len(self.items)
+
+        values: list[Any] = [
+            coerce_amount(amount) if selected and amount is not None else None
+            for amount, selected in zip(amounts, mask)
+        ]
+        if charge:
+            total = self.total
+            for i, value in enumerate(values):
+                if value is not None:
+                    total[i] += value
+        self.extra_rows.append((identifier, label, values, extra, charge))
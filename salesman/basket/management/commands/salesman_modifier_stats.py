@@ -0,0 +1,43 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from salesman.basket.profiling import modifier_stats
+
+
+class Command(BaseCommand):
+    help = "Show basket modifier stats collected with SALESMAN_BASKET_PROFILING."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Clear collected stats after showing them.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stats = modifier_stats.get_stats()
+        if not stats:
+            self.stdout.write("No stats collected.")
+        else:
+            row = "{:<24} {:<16} {:>10} {:>12} {:>10} {:>8}"
+            header = ["Modifier", "Phase", "Calls", "Total (ms)", "Avg (ms)", "Rows"]
+            self.stdout.write(row.format(*header))
+            stats.sort(key=lambda x: x["time"], reverse=True)
+            for x in stats:
+                total = x["time"] * 1000
+                average = total / x["calls"] if x["calls"] else 0
+                self.stdout.write(
+                    row.format(
+                        x["modifier"],
+                        x["phase"],
+                        x["calls"],
+                        f"{total:.2f}",
+                        f"{average:.3f}",
+                        x["rows"],
+                    )
+                )
+
+        if options["reset"]:
+            modifier_stats.reset()
+            self.stdout.write("Stats cleared.")
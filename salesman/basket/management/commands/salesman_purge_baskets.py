@@ -0,0 +1,108 @@
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import models, transaction
+from django.utils import timezone
+
+from salesman.core.utils import get_salesman_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete baskets not updated within the given number of days, "
+        "in batches by primary key range."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--anonymous-days",
+            type=int,
+            default=30,
+            help="Delete anonymous baskets older than this. Defaults to 30.",
+        )
+        parser.add_argument(
+            "--user-days",
+            type=int,
+            default=None,
+            help="Delete baskets of users older than this. Not deleted by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Size of the primary key range deleted at once. Defaults to 1000.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to sleep between batches. Defaults to 0.1.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only show the number of baskets that would be deleted.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size must be a positive number.")
+
+        groups = [
+            ("anonymous", options["anonymous_days"], True),
+            ("user", options["user_days"], False),
+        ]
+        for name, days, anonymous in groups:
+            if days is None:
+                continue
+            if days < 0:
+                raise CommandError("Number of days can't be negative.")
+            Basket = get_salesman_model("Basket")
+            cutoff = timezone.now() - timedelta(days=days)
+            queryset = Basket.objects.filter(
+                user__isnull=anonymous,
+                date_updated__lt=cutoff,
+            ).order_by()
+            if options["dry_run"]:
+                count = queryset.count()
+                self.stdout.write(f"Would delete {count} {name} baskets.")
+                continue
+            deleted = self.purge(queryset, name, options)
+            self.stdout.write(f"Deleted {deleted} {name} baskets.")
+
+    def purge(
+        self,
+        queryset: models.QuerySet[Any],
+        name: str,
+        options: dict[str, Any],
+    ) -> int:
+        """
+        Delete baskets in queryset one primary key range at a time, deleting
+        items of the baskets first to keep each transaction short.
+        """
+        BasketItem = get_salesman_model("BasketItem")
+        bounds = queryset.aggregate(start=models.Min("pk"), end=models.Max("pk"))
+        if bounds["start"] is None:
+            return 0
+
+        start, end, size = bounds["start"], bounds["end"], options["batch_size"]
+        deleted = 0
+        while start <= end:
+            with transaction.atomic():
+                batch = queryset.filter(pk__gte=start, pk__lt=start + size)
+                batch = batch.select_for_update().order_by("pk")
+                ids = list(batch.values_list("pk", flat=True))
+                if ids:
+                    BasketItem.objects.filter(basket_id__in=ids).delete()
+                    queryset.model.objects.filter(pk__in=ids).delete()
+            start += size
+            if ids:
+                deleted += len(ids)
+                self.stdout.write(
+                    f"Deleted {deleted} {name} baskets up to id {ids[-1]}."
+                )
+                if start <= end and options["sleep"]:
+                    time.sleep(options["sleep"])
+        return deleted
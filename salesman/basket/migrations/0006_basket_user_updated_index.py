@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("salesmanbasket", "0005_basket_totals"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="basket",
+            index=models.Index(
+                fields=["user", "date_updated"], name="salesmanbasket_basket_user_upd"
+            ),
+        ),
+    ]
@@ -1,35 +1,138 @@
 from __future__ import annotations
 
-from collections import OrderedDict
+import hashlib
+import json
+from collections import OrderedDict, defaultdict
 from decimal import Decimal
-from typing import TYPE_CHECKING, Any, Generator
+from typing import TYPE_CHECKING, Any, Generator, Iterable
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models, transaction
+from django.core.exceptions import SynchronousOnlyOperation
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models.functions import Coalesce
 from django.http import HttpRequest
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
 from salesman.conf import app_settings
-from salesman.core.typing import Product
-from salesman.core.utils import get_salesman_model
+from salesman.core.money import Amount, coerce_amount, to_amount
+from salesman.core.typing import BatchPricedProduct, Product
+from salesman.core.utils import get_salesman_cache, get_salesman_model
+
+from .profiling import is_explaining, profile_pricing
 
 if TYPE_CHECKING:  # pragma: no cover
     from django.db.models.manager import RelatedManager
 
+    from .storage import BaseBasketStorage
+
 BASKET_ID_SESSION_KEY = "BASKET_ID"
+USER_BASKET_CACHE_KEY = "salesman:user-basket:{user_id}"
+
+
+async def _aget_user(request: HttpRequest) -> Any:
+    """
+    Returns user of the request, using ``request.auser()`` when available.
+    """
+    if hasattr(request, "auser"):
+        return await request.auser()
+    return getattr(request, "user", None)
+
+
+async def _asession(session: Any, method: str, *args: Any) -> Any:
+    """
+    Call session ``method`` using its async version when available,
+    session can be a plain dict, eg. in tests.
+    """
+    if hasattr(session, f"a{method}"):
+        return await getattr(session, f"a{method}")(*args)
+    if method == "set":
+        session[args[0]] = args[1]
+        return None
+    return getattr(session, method)(*args)
+
+
+def get_hash(data: Any) -> str:
+    """
+    Returns a hash of JSON serializable data.
+    """
+    value = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha1(value.encode()).hexdigest()
+
+
+class ExtraRow:
+    """
+    Extra row stored in ``extra_rows`` dict on both the basket and basket item.
+    Mostly added when processing basket modifiers and rendered lazily
+    using ``ExtraRowSerializer``.
+    """
+
+    __slots__ = ("label", "amount", "extra", "charge")
+
+    def __init__(
+        self,
+        label: str = "",
+        amount: Decimal | float | int | str = 0,
+        extra: dict[str, Any] | None = None,
+        charge: bool = True,
+    ) -> None:
+        self.label = label
+        self.amount = amount
+        self.extra = extra if extra is not None else {}
+        self.charge = charge
+
+    def __repr__(self) -> str:
+        return f"<ExtraRow: {self.label} {self.amount}>"
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns row values as a dict that can be stored as JSON.
+        """
+        return {
+            "label": self.label,
+            "amount": self.amount,
+            "extra": self.extra,
+            "charge": self.charge,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ExtraRow:
+        """
+        Returns row from values returned by ``to_dict()``.
+        """
+        return cls(**dict(data, amount=coerce_amount(data["amount"])))
+
+    @property
+    def data(self) -> dict[str, Any]:
+        """
+        Returns serialized row, kept for compatibility with rows
+        that were stored as ``ExtraRowSerializer`` instances.
+        """
+        from .serializers import ExtraRowSerializer
+
+        return dict(ExtraRowSerializer(self).data)
 
 
 class BasketManager(models.Manager["BaseBasket"]):
     def get_or_create_from_request(
         self,
         request: HttpRequest,
+        lazy: bool = False,
     ) -> tuple[BaseBasket, bool]:
         """
         Get basket from request or create a new one.
         If user is logged in session basket gets merged into a user basket.
+        Basket id of a logged in user is cached in ``SALESMAN_CACHE``.
+
+        Args:
+            request (HttpRequest): Django request
+            lazy (bool, optional): Don't save a new basket until the first write,
+                eg. when an item is added. Defaults to False.
 
         Returns:
             tuple: (basket, created)
@@ -42,17 +145,14 @@ class BasketManager(models.Manager["BaseBasket"]):
         except (KeyError, self.model.DoesNotExist):
             session_basket = None
 
+        basket: BaseBasket | None
+        user_id = None
         if hasattr(request, "user") and request.user.is_authenticated:
-            try:
-                basket, created = self.get_or_create(user_id=request.user.id)
-            except self.model.MultipleObjectsReturned:
-                # User has multiple baskets, merge them.
-                baskets = list(self.filter(user=request.user.id))
-                basket, created = baskets[0], False
-                for other in baskets[1:]:
-                    basket.merge(other)
-
-            if session_basket:
+            user_id = request.user.id
+            create = not lazy or session_basket is not None
+            basket, created = self.get_user_basket(user_id, create=create)
+
+            if session_basket and basket:
                 # Merge session basket into user basket.
                 basket.merge(session_basket)
 
@@ -60,12 +160,189 @@ class BasketManager(models.Manager["BaseBasket"]):
                 # Delete session basket id from session so that it doesn't get
                 # re-fetched while user is still logged in.
                 del request.session[BASKET_ID_SESSION_KEY]
-        else:
+        elif session_basket or not lazy:
             basket, created = session_basket or self.create(), not session_basket
+        else:
+            basket, created = None, False
+
+        if basket is None:
+            # Basket has no items and is saved with the first write.
+            basket = self.model(user_id=user_id)
+            basket._cached_items = []
+            basket._lazy_request = request
+        elif user_id is None:
             request.session[BASKET_ID_SESSION_KEY] = basket.pk
+        return basket, created
+
+    async def aget_or_create_from_request(
+        self,
+        request: HttpRequest,
+        lazy: bool = False,
+    ) -> tuple[BaseBasket, bool]:
+        """
+        Async version of ``get_or_create_from_request()``. User is resolved with
+        ``request.auser()`` when available, and the session with its async methods.
+        """
+        if not hasattr(request, "session"):
+            request.session = {}
+        session = request.session
+        session_basket_id = await _asession(session, "get", BASKET_ID_SESSION_KEY)
+        session_basket = None
+        if session_basket_id is not None:
+            try:
+                session_basket = await self.aget(id=session_basket_id, user=None)
+            except self.model.DoesNotExist:
+                pass
+
+        basket: BaseBasket | None
+        user_id = None
+        user = await _aget_user(request)
+        if user is not None and user.is_authenticated:
+            user_id = user.id
+            create = not lazy or session_basket is not None
+            basket, created = await self.aget_user_basket(user_id, create=create)
+
+            if session_basket and basket:
+                # Merge session basket into user basket.
+                await basket.amerge(session_basket)
+
+            # Delete session basket id, see ``get_or_create_from_request()``.
+            await _asession(session, "pop", BASKET_ID_SESSION_KEY, None)
+        elif session_basket or not lazy:
+            basket = session_basket or await self.acreate()
+            created = not session_basket
+        else:
+            basket, created = None, False
+
+        if basket is None:
+            basket = self.model(user_id=user_id)
+            basket._cached_items = []
+            basket._lazy_request = request
+        elif user_id is None:
+            await _asession(session, "set", BASKET_ID_SESSION_KEY, basket.pk)
+        return basket, created
+
+    def get_user_basket(
+        self,
+        user_id: int,
+        create: bool = True,
+    ) -> tuple[BaseBasket | None, bool]:
+        """
+        Get basket for user using the basket id cached in ``SALESMAN_CACHE``.
+        Multiple baskets of the user are merged.
+
+        Args:
+            user_id (int): User id
+            create (bool, optional): Create basket if missing. Defaults to True.
 
+        Returns:
+            tuple: (basket or None if missing and not created, created)
+        """
+        cache = get_salesman_cache()
+        cache_key = USER_BASKET_CACHE_KEY.format(user_id=user_id)
+        basket_id = cache.get(cache_key, None)
+        if basket_id is not None:
+            try:
+                return self.get(id=basket_id, user_id=user_id), False
+            except self.model.DoesNotExist:
+                pass
+
+        baskets = list(self.filter(user_id=user_id))
+        if not baskets and not create:
+            return None, False
+        if not baskets:
+            basket, created = self.create(user_id=user_id), True
+        else:
+            # User has multiple baskets, merge them.
+            basket, created = baskets[0], False
+            for other in baskets[1:]:
+                basket.merge(other)
+        cache.set(cache_key, basket.pk, None)
+        return basket, created
+
+    async def aget_user_basket(
+        self,
+        user_id: int,
+        create: bool = True,
+    ) -> tuple[BaseBasket | None, bool]:
+        """
+        Async version of ``get_user_basket()``.
+        """
+        cache = get_salesman_cache()
+        cache_key = USER_BASKET_CACHE_KEY.format(user_id=user_id)
+        basket_id = await cache.aget(cache_key, None)
+        if basket_id is not None:
+            try:
+                return await self.aget(id=basket_id, user_id=user_id), False
+            except self.model.DoesNotExist:
+                pass
+
+        baskets = [basket async for basket in self.filter(user_id=user_id)]
+        if not baskets and not create:
+            return None, False
+        if not baskets:
+            basket, created = await self.acreate(user_id=user_id), True
+        else:
+            basket, created = baskets[0], False
+            for other in baskets[1:]:
+                await basket.amerge(other)
+        await cache.aset(cache_key, basket.pk, None)
         return basket, created
 
+    def set_request_basket(self, request: HttpRequest, basket: BaseBasket) -> None:
+        """
+        Store basket id for the request, in the session for anonymous users
+        or in ``SALESMAN_CACHE`` for logged in users.
+
+        Args:
+            request (HttpRequest): Django request
+            basket (BaseBasket): Saved basket instance
+        """
+        if hasattr(request, "user") and request.user.is_authenticated:
+            cache_key = USER_BASKET_CACHE_KEY.format(user_id=request.user.id)
+            get_salesman_cache().set(cache_key, basket.pk, None)
+        else:
+            request.session[BASKET_ID_SESSION_KEY] = basket.pk
+
+    def clear_request_basket(self, request: HttpRequest, basket: BaseBasket) -> None:
+        """
+        Remove basket id stored for the request with ``set_request_basket()``,
+        eg. when the basket was deleted.
+
+        Args:
+            request (HttpRequest): Django request
+            basket (BaseBasket): Basket instance
+        """
+        if hasattr(request, "user") and request.user.is_authenticated:
+            cache_key = USER_BASKET_CACHE_KEY.format(user_id=request.user.id)
+            if get_salesman_cache().get(cache_key, None) == basket.pk:
+                get_salesman_cache().delete(cache_key)
+        elif request.session.get(BASKET_ID_SESSION_KEY, None) == basket.pk:
+            del request.session[BASKET_ID_SESSION_KEY]
+
+    def get_from_request(self, request: HttpRequest) -> BaseBasket:
+        """
+        Returns basket for request from ``SALESMAN_BASKET_STORAGE``, by default
+        a lazy basket, see ``get_or_create_from_request()``. Basket is resolved
+        once and attached to the request, so that it's shared between views
+        handling the same request.
+
+        Args:
+            request (HttpRequest): Django request
+
+        Returns:
+            BaseBasket: Basket instance
+        """
+        # Attach to Django request, DRF request wraps it.
+        http_request = getattr(request, "_request", request)
+        basket: BaseBasket | None = getattr(http_request, "salesman_basket", None)
+        if basket is None:
+            from .storage import get_basket_storage
+
+            basket = get_basket_storage(request).get()
+            setattr(http_request, "salesman_basket", basket)
+        return basket
+
 
 class BaseBasket(models.Model):
     user = models.ForeignKey(
@@ -77,6 +354,23 @@ class BaseBasket(models.Model):
 
     extra = models.JSONField(_("Extra"), blank=True, default=dict)
 
+    # Computed totals stored with a fingerprint of basket contents,
+    # used when ``SALESMAN_BASKET_SNAPSHOT`` is enabled.
+    snapshot = models.JSONField(
+        _("Snapshot"),
+        blank=True,
+        default=dict,
+        editable=False,
+        encoder=DjangoJSONEncoder,
+    )
+
+    # Item count and total quantity kept in sync with the items,
+    # see ``update_totals()``.
+    item_count = models.PositiveIntegerField(_("Item count"), default=0, editable=False)
+    total_quantity = models.PositiveIntegerField(
+        _("Total quantity"), default=0, editable=False
+    )
+
     date_created = models.DateTimeField(_("Date created"), auto_now_add=True)
     date_updated = models.DateTimeField(_("Date updated"), auto_now=True)
 
@@ -84,12 +378,36 @@ class BaseBasket(models.Model):
     items: RelatedManager[BaseBasketItem]
 
     _cached_items: list[BaseBasketItem] | None = None
+    _cached_refs: dict[str, BaseBasketItem] | None = None
+
+    # Basket version, request and contents key for which the basket was last priced.
+    _version: int = 0
+    _priced: tuple[HttpRequest, int, str] | None = None
+
+    # Item results before basket processing, reused for unchanged items.
+    _item_results: tuple[str, dict[str, Any]] | None = None
+
+    # Request of a lazy basket that is saved with the first write.
+    _lazy_request: HttpRequest | None = None
+
+    # Storage keeping an unsaved basket, see ``SALESMAN_BASKET_STORAGE``.
+    _storage: BaseBasketStorage | None = None
+
+    # Set when the basket is priced with ``update()``.
+    subtotal: Amount
+    total: Amount
 
     class Meta:
         abstract = True
         verbose_name = _("Basket")
         verbose_name_plural = _("Baskets")
         ordering = ["-date_created"]
+        indexes = [
+            models.Index(
+                fields=["user", "date_updated"],
+                name="%(app_label)s_%(class)s_user_upd",
+            ),
+        ]
 
     def __str__(self) -> str:
         return str(self.pk) if self.pk else "(unsaved)"
@@ -98,47 +416,487 @@ class BaseBasket(models.Model):
         for item in self.items.all():
             yield item
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if self._storage is not None and self.in_storage:
+            self._storage.save(self)
+            return
+        if self.pk and not self._state.adding and not args and not kwargs:
+            # Totals are only written with ``update_totals()``.
+            kwargs["update_fields"] = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key
+                and f.name not in ["item_count", "total_quantity"]
+                and f.attname in self.__dict__
+            ]
+        super().save(*args, **kwargs)
+        request, self._lazy_request = self._lazy_request, None
+        if request is not None:
+            # Store id of a lazy basket once it's saved.
+            type(self).objects.set_request_basket(request, self)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        if self._storage is not None and self.in_storage:
+            self._storage.delete(self)
+        if not self.pk:
+            self._cached_items = []
+            self.invalidate()
+            return 0, {}
+        return super().delete(*args, **kwargs)
+
+    @property
+    def in_storage(self) -> bool:
+        """
+        Returns True if basket is kept in ``SALESMAN_BASKET_STORAGE``
+        outside of the database.
+        """
+        return self._storage is not None and self.pk is None
+
+    def promote(self) -> None:
+        """
+        Save basket kept in storage to the database together with its items,
+        eg. before the checkout. Does nothing for baskets in the database.
+        """
+        if self._storage is not None and self.in_storage:
+            self._storage.promote(self)
+
+    def save_lazy(self) -> None:
+        """
+        Save a lazy basket returned from ``get_or_create_from_request()``,
+        called before the first write to the basket.
+        """
+        if self.pk is None and self._lazy_request is not None:
+            self.save()
+
     def update(self, request: HttpRequest) -> None:
         """
         Process basket with modifiers defined in ``SALESMAN_BASKET_MODIFIERS``.
         This method sets ``subtotal``, ``total`` and ``extra_rows`` attributes on the
         basket and updates the items. Should be called every time the basket item is
-        added, removed or updated or basket extra is updated.
+        added, removed or updated or basket extra is updated. Basket is always priced
+        again, use ``ensure_priced()`` to skip pricing when the result is still valid.
+
+        When ``SALESMAN_BASKET_SNAPSHOT`` is enabled a stored snapshot with matching
+        fingerprint is used instead of running the modifiers. When
+        ``SALESMAN_BASKET_PRICING_CACHE`` is enabled results are shared between
+        baskets with the same contents, see ``get_pricing_cache_key()``. When all
+        modifiers that process items are ``item_local`` only items that changed
+        since the last pricing are processed again, see ``get_item_results()``.
 
         Args:
             request (HttpRequest): Django request
         """
         from .modifiers import basket_modifiers_pool
 
-        items = self.get_items()
+        fingerprint, fingerprint_data = None, None
+        if app_settings.SALESMAN_BASKET_SNAPSHOT and self.pk:
+            fingerprint_data = self.get_fingerprint_data(request)
+            fingerprint = get_hash(fingerprint_data)
+            if self.snapshot.get("fingerprint") == fingerprint and not is_explaining():
+                self.set_pricing_data(self.snapshot, request)
+                return
+
+        # Reuse results of baskets with the same contents.
+        cache_key: str | None = None
+        cache_refs: list[str] = []
+        if app_settings.SALESMAN_BASKET_PRICING_CACHE and not is_explaining():
+            fingerprint_data = fingerprint_data or self.get_fingerprint_data(request)
+            cache_key, cache_refs = self.get_pricing_cache_key(fingerprint_data)
+            cached = get_salesman_cache().get(cache_key, None)
+            if cached is not None:
+                cached["items"] = dict(zip(cache_refs, cached["items"]))
+                self.set_pricing_data(cached, request)
+                return
+
+        # Modifier calls are recorded when profiling is enabled.
+        with profile_pricing(self, request):
+            items = self.get_items()
+
+            # Prefetch data for modifiers, concurrent modifiers run in a thread pool.
+            self.prefetched: dict[str, Any] = basket_modifiers_pool.prefetch(
+                self, request
+            )
 
-        # Setup basket and items.
-        for modifier in basket_modifiers_pool.get_modifiers():
-            modifier.setup_basket(self, request)
+            # Setup basket and items, only hooks overridden by modifiers are called.
+            for setup_basket, setup_item in basket_modifiers_pool.get_hooks(
+                "setup_basket", "setup_item"
+            ):
+                if setup_basket:
+                    setup_basket(self, request)
+                if setup_item:
+                    for item in items:
+                        setup_item(item, request)
+
+            self.extra_rows: dict[str, ExtraRow] = OrderedDict()
+            self.subtotal = coerce_amount(0)
+            self.total = coerce_amount(0)
+
+            # Process changed basket items, reuse results for the rest.
+            item_results = self.get_item_results(request, fingerprint_data)
+            results = item_results[1] if item_results else {}
+            dirty = []
+            for item in items:
+                values = results.get(item.ref, None)
+                if values and values["key"] == item.get_pricing_key():
+                    item.set_pricing_data(values)
+                else:
+                    dirty.append(item)
+            prices = self.get_batch_prices(dirty, request)
+            if basket_modifiers_pool.has_column_hooks():
+                for item in dirty:
+                    item.set_unit_price(request, price=prices.get(item.ref, None))
+                self.process_columns(dirty, request)
+            else:
+                for item in dirty:
+                    item.update(request, price=prices.get(item.ref, None))
             for item in items:
-                modifier.setup_item(item, request)
+                self.subtotal += item.total
+            self.total = self.subtotal
+            if item_results:
+                results = {item.ref: item.get_pricing_data() for item in items}
+                self._item_results = (item_results[0], results)
+
+            # Finalize items and process basket.
+            for finalize_item, process_basket in basket_modifiers_pool.get_hooks(
+                "finalize_item", "process_basket"
+            ):
+                if finalize_item:
+                    for item in items:
+                        finalize_item(item, request)
+                if process_basket:
+                    process_basket(self, request)
+
+            # Finalize basket.
+            for (finalize_basket,) in basket_modifiers_pool.get_hooks(
+                "finalize_basket"
+            ):
+                if finalize_basket:
+                    finalize_basket(self, request)
+
+            self._cached_items = items
+            self.set_priced(request)
+
+        if cache_key:
+            data = self.get_pricing_data()
+            data["items"] = [data["items"][ref] for ref in cache_refs]
+            timeout = app_settings.SALESMAN_BASKET_PRICING_CACHE_TIMEOUT
+            get_salesman_cache().set(cache_key, data, timeout)
+
+        if fingerprint:
+            snapshot = dict(self.get_pricing_data(), fingerprint=fingerprint)
+            if item_results:
+                snapshot.update(results_fingerprint=item_results[0], results=results)
+            self.snapshot = snapshot
+            type(self).objects.filter(pk=self.pk).update(snapshot=self.snapshot)
+        elif item_results and self.pk:
+            from .utils import ITEM_RESULTS_CACHE_KEY
+
+            key = ITEM_RESULTS_CACHE_KEY.format(id=self.pk)
+            timeout = app_settings.SALESMAN_BASKET_PRICING_CACHE_TIMEOUT
+            get_salesman_cache().set(key, self._item_results, timeout)
+
+    def get_item_results(
+        self,
+        request: HttpRequest,
+        fingerprint_data: dict[str, Any] | None = None,
+    ) -> tuple[Any, dict[str, Any]] | None:
+        """
+        Returns item results stored on a previous pricing that are valid for the
+        request, as a tuple of a token and results keyed by item ref. Results are
+        only reused when all modifiers that process items are ``item_local`` and
+        pricing is not explained, otherwise ``None`` is returned.
+
+        Results are valid for the same product and modifier versions and modifier
+        request keys. They're read from the stored snapshot when
+        ``SALESMAN_BASKET_SNAPSHOT`` is enabled, otherwise from ``SALESMAN_CACHE``.
+
+        Args:
+            request (HttpRequest): Django request
+            fingerprint_data (dict, optional): Data from ``get_fingerprint_data()``
+
+        Returns:
+            Optional[tuple]: Results token and item results
+        """
+        from .modifiers import basket_modifiers_pool
+        from .utils import ITEM_RESULTS_CACHE_KEY, get_modifier_versions
+
+        if not basket_modifiers_pool.is_item_local() or is_explaining():
+            return None
+
+        data = fingerprint_data or self.get_fingerprint_data(request)
+        data = {k: data[k] for k in ["precision", "versions", "modifiers"]}
+        identifiers = [m.identifier for m in basket_modifiers_pool.get_modifiers()]
+        data["modifier_versions"] = get_modifier_versions(identifiers)
+        token = get_hash(data)
+
+        if self._item_results and self._item_results[0] == token:
+            return token, self._item_results[1]
+        if not self.pk:
+            return token, {}
+        if app_settings.SALESMAN_BASKET_SNAPSHOT:
+            if self.snapshot.get("results_fingerprint") == token:
+                return token, self.snapshot.get("results", {})
+            return token, {}
+        key = ITEM_RESULTS_CACHE_KEY.format(id=self.pk)
+        cached = get_salesman_cache().get(key, None)
+        if cached and cached[0] == token:
+            return token, cached[1]
+        return token, {}
+
+    def process_columns(
+        self, items: list[BaseBasketItem], request: HttpRequest
+    ) -> None:
+        """
+        Process items with modifiers as columns. Modifiers that define
+        ``process_items`` process all items at once, for the rest
+        ``process_item`` is called for each item.
+
+        Args:
+            items (list[BaseBasketItem]): Basket items with unit price set
+            request (HttpRequest): Django request
+        """
+        from .columns import ItemColumns
+        from .modifiers import basket_modifiers_pool
+
+        columns = ItemColumns(items)
+        for process_items, process_item in basket_modifiers_pool.get_hooks(
+            "process_items", "process_item"
+        ):
+            if process_items:
+                process_items(columns, request)
+            elif process_item:
+                columns.flush()
+                for item in items:
+                    process_item(item, request)
+                columns.refresh()
+        columns.flush()
+
+    def get_batch_prices(
+        self,
+        items: list[BaseBasketItem],
+        request: HttpRequest,
+    ) -> dict[str, Decimal]:
+        """
+        Returns prices for items whose product implements the batch pricing
+        protocol, using one ``get_prices`` call per product type.
 
-        self.extra_rows: dict[str, Any] = OrderedDict()
-        self.subtotal = Decimal(0)
-        self.total = Decimal(0)
+        Args:
+            items (list[BaseBasketItem]): Basket items
+            request (HttpRequest): Django request
 
-        # Process basket items.
+        Returns:
+            dict: Prices keyed by item ref
+        """
+        groups: dict[type[BatchPricedProduct], dict[int, BatchPricedProduct]]
+        groups, batched = defaultdict(dict), {}
         for item in items:
-            item.update(request)
-            self.subtotal += item.total
-        self.total = self.subtotal
+            product = item.product
+            if type(product) not in batched:
+                batched[type(product)] = isinstance(product, BatchPricedProduct)
+            if batched[type(product)]:
+                groups[type(product)][product.id] = product
+
+        product_prices = {}
+        for model, products in groups.items():
+            values = list(products.values())
+            prices = model.get_prices(values, request)
+            for product, price in zip(values, prices):
+                product_prices[(model, product.id)] = price
+
+        ret = {}
+        for item in items:
+            key = (type(item.product), getattr(item.product, "id", None))
+            if key in product_prices:
+                ret[item.ref] = product_prices[key]
+        return ret
 
-        # Finalize items and process basket.
-        for modifier in basket_modifiers_pool.get_modifiers():
-            for item in items:
-                modifier.finalize_item(item, request)
-            modifier.process_basket(self, request)
+    def get_fingerprint(self, request: HttpRequest) -> str:
+        """
+        Returns a fingerprint of basket contents used to validate the snapshot.
+        Includes item refs, products, quantities and extra, basket extra, current
+        product versions and request keys declared by the modifiers.
+        Loads basket items without products.
+
+        Args:
+            request (HttpRequest): Django request
+
+        Returns:
+            str: Fingerprint hash
+        """
+        return get_hash(self.get_fingerprint_data(request))
+
+    def get_fingerprint_data(self, request: HttpRequest) -> dict[str, Any]:
+        """
+        Returns data used to compute the basket fingerprint.
+
+        Args:
+            request (HttpRequest): Django request
 
-        # Finalize basket.
-        for modifier in basket_modifiers_pool.get_modifiers():
-            modifier.finalize_basket(self, request)
+        Returns:
+            dict: Fingerprint data
+        """
+        from .modifiers import basket_modifiers_pool
+        from .utils import get_product_versions
 
-        self._cached_items = items
+        if self._cached_items is None:
+            self._cached_items = list(self.items.all())
+
+        lines = []
+        for item in self._cached_items:
+            content_type = ContentType.objects.get_for_id(item.product_content_type_id)
+            label = f"{content_type.app_label}.{content_type.model}"
+            lines.append([item.ref, label, item.product_id, item.quantity, item.extra])
+
+        return {
+            "items": lines,
+            "extra": self.extra,
+            "precision": app_settings.SALESMAN_PRICE_PRECISION,
+            "versions": get_product_versions(line[1] for line in lines),
+            "modifiers": [
+                [modifier.identifier, modifier.get_request_key(request)]
+                for modifier in basket_modifiers_pool.get_modifiers()
+            ],
+        }
+
+    def get_pricing_cache_key(
+        self,
+        fingerprint_data: dict[str, Any],
+    ) -> tuple[str, list[str]]:
+        """
+        Returns a key for pricing results shared between baskets with the same
+        contents, together with item refs in the order used for the key. Key is
+        computed from basket lines without refs in a canonical order, basket extra,
+        product and modifier versions and modifier request keys.
+
+        Args:
+            fingerprint_data (dict): Data from ``get_fingerprint_data()``
+
+        Returns:
+            tuple: Cache key and item refs
+        """
+        from .modifiers import basket_modifiers_pool
+        from .utils import PRICING_CACHE_KEY, get_modifier_versions
+
+        lines = sorted(fingerprint_data["items"], key=lambda x: get_hash(x[1:]))
+        identifiers = [m.identifier for m in basket_modifiers_pool.get_modifiers()]
+        data = dict(
+            fingerprint_data,
+            items=[line[1:] for line in lines],
+            modifier_versions=get_modifier_versions(identifiers),
+        )
+        key = PRICING_CACHE_KEY.format(key=get_hash(data))
+        return key, [line[0] for line in lines]
+
+    def get_pricing_data(self) -> dict[str, Any]:
+        """
+        Returns computed basket and item values in a form that can be stored
+        as JSON. Basket must be updated before calling this method.
+
+        Returns:
+            dict: Pricing data
+        """
+        return {
+            "subtotal": self.subtotal,
+            "total": self.total,
+            "extra_rows": {k: row.to_dict() for k, row in self.extra_rows.items()},
+            "items": {item.ref: item.get_pricing_data() for item in self.get_items()},
+        }
+
+    def set_pricing_data(self, data: dict[str, Any], request: HttpRequest) -> None:
+        """
+        Set computed basket and item values from data returned by
+        ``get_pricing_data()`` without running the modifiers.
+
+        Args:
+            data (dict): Pricing data
+            request (HttpRequest): Django request
+        """
+        if self._cached_items is None:
+            self._cached_items = list(self.items.all())
+        for item in self._cached_items:
+            item.set_pricing_data(data["items"][item.ref])
+
+        self.subtotal = coerce_amount(data["subtotal"])
+        self.total = coerce_amount(data["total"])
+        self.extra_rows = OrderedDict(
+            (k, ExtraRow.from_dict(row)) for k, row in data["extra_rows"].items()
+        )
+        self.set_priced(request)
+
+    async def aupdate(self, request: HttpRequest) -> None:
+        """
+        Async version of ``update()``.
+        """
+        await sync_to_async(self.update)(request)
+
+    def ensure_priced(self, request: HttpRequest) -> None:
+        """
+        Price the basket with ``update()`` unless it's already priced for the
+        request and its current contents, see ``is_priced()``. Used when rendering
+        the basket so that it's priced once per request.
+
+        Args:
+            request (HttpRequest): Django request
+        """
+        if not self.is_priced(request):
+            self.update(request)
+
+    async def aensure_priced(self, request: HttpRequest) -> None:
+        """
+        Async version of ``ensure_priced()``. Returns without leaving the event
+        loop when the basket is already priced.
+        """
+        if not self.is_priced(request):
+            await sync_to_async(self.update)(request)
+
+    def is_priced(self, request: HttpRequest) -> bool:
+        """
+        Check if basket is already priced for the given request and its current
+        contents, in which case ``ensure_priced()`` skips pricing. Contents are
+        compared using basket extra and ref, quantity and extra of the items.
+
+        Args:
+            request (HttpRequest): Django request
+
+        Returns:
+            bool: True if pricing result is still valid
+        """
+        request = getattr(request, "_request", request)
+        return (
+            self._priced is not None
+            and self._priced[0] is request
+            and self._priced[1] == self._version
+            and self._cached_items is not None
+            and "total" in self.__dict__
+            and self._priced[2] == self.get_contents_key()
+        )
+
+    def set_priced(self, request: HttpRequest) -> None:
+        """
+        Mark basket as priced for the request and its current contents.
+        """
+        # Store the underlying Django request, DRF request wraps it.
+        request = getattr(request, "_request", request)
+        self._priced = (request, self._version, self.get_contents_key())
+
+    def get_contents_key(self) -> str:
+        """
+        Returns a hash of basket extra and ref, quantity and extra of cached items,
+        used to detect changes made without calling ``invalidate()``.
+        """
+        items = [(x.ref, x.quantity, x.extra) for x in self._cached_items or []]
+        return get_hash([self.extra, items])
+
+    def invalidate(self) -> None:
+        """
+        Clear cached items, their ref index and pricing result. Should be called
+        when basket items or extra are changed outside of the basket methods.
+        """
+        # Items of an unsaved basket only exist in memory.
+        if self.pk:
+            self._cached_items = None
+        self._cached_refs = None
+        self._version += 1
 
     def add(
         self,
@@ -148,30 +906,264 @@ class BaseBasket(models.Model):
         extra: dict[str, Any] | None = None,
     ) -> BaseBasketItem:
         """
-        Add product to the basket.
+        Add product to the basket. Quantity of an existing item with the same ref
+        is increased in the database, using a single upsert query when supported.
+        Upsert is skipped when item saves run custom code, see
+        ``BaseBasketItem.has_save_hooks()``.
 
         Returns:
             BasketItem: BasketItem instance
         """
+        if self.in_storage:
+            return self._store_items(
+                [{"product": product, "quantity": quantity, "ref": ref, "extra": extra}]
+            )[0]
+        self.save_lazy()
         BasketItem = get_salesman_model("BasketItem")
         if not ref:
             ref = BasketItem.get_product_ref(product)
-        try:
-            item = self.items.get(ref=ref)
-            item.quantity += quantity
-            item.extra = extra or item.extra
-            item.save(update_fields=["quantity", "extra", "date_updated"])
-        except BasketItem.DoesNotExist:
-            item = BasketItem.objects.create(
-                basket=self,
-                product=product,
-                quantity=quantity,
-                ref=ref,
-                extra=extra or {},
-            )
-        self._cached_items = None
+        item = BasketItem(
+            basket=self,
+            product=product,
+            quantity=quantity,
+            ref=ref,
+            extra=extra or {},
+        )
+        using = router.db_for_write(BasketItem, instance=self)
+        features = connections[using].features
+        with transaction.atomic(using=using):
+            if (
+                features.supports_update_conflicts_with_target
+                and features.can_return_columns_from_insert
+                and not BasketItem.has_save_hooks()
+            ):
+                item = self._upsert_item(item, using, update_extra=bool(extra))
+                self.update_totals()
+            else:
+                item = self._add_item(item, using, update_extra=bool(extra))
+        self.invalidate()
         return item
 
+    async def aadd(
+        self,
+        product: Product,
+        quantity: int = 1,
+        ref: str | None = None,
+        extra: dict[str, Any] | None = None,
+    ) -> BaseBasketItem:
+        """
+        Async version of ``add()``, runs in a thread since the item is
+        written in a transaction.
+        """
+        return await sync_to_async(self.add)(
+            product, quantity=quantity, ref=ref, extra=extra
+        )
+
+    @transaction.atomic
+    def bulk_add(self, entries: Iterable[dict[str, Any]]) -> list[BaseBasketItem]:
+        """
+        Add many products to the basket at once. Each entry is a dict with
+        ``product`` and optional ``quantity``, ``ref`` and ``extra`` keys, same
+        as arguments of ``add()`` method. Existing items are updated and new ones
+        created with a single query each, or saved one by one when item saves run
+        custom code, see ``BaseBasketItem.has_save_hooks()``.
+
+        Args:
+            entries (Iterable[dict]): Entries to add
+
+        Returns:
+            list[BaseBasketItem]: Added or updated basket items
+        """
+        if self.in_storage:
+            return self._store_items(entries)
+        self.save_lazy()
+        entries = list(entries)
+        try:
+            with transaction.atomic():
+                items = self._bulk_add_items(entries)
+        except IntegrityError:
+            # Item was created concurrently, retry to update it instead.
+            items = self._bulk_add_items(entries)
+        self.update_totals()
+        self.invalidate()
+        return items
+
+    def _bulk_add_items(self, entries: list[dict[str, Any]]) -> list[BaseBasketItem]:
+        """
+        Update existing items and create new ones for entries, see ``bulk_add()``.
+        """
+        BasketItem = get_salesman_model("BasketItem")
+        items, extras = self._build_items(entries)
+        existing = self.items.filter(ref__in=items).select_for_update()
+        updated = []
+        for item in existing:
+            new_item = items[item.ref]
+            item.quantity += new_item.quantity
+            item.extra = extras.get(item.ref, item.extra)
+            item.date_updated = timezone.now()
+            item.product = new_item.product
+            items[item.ref] = item
+            updated.append(item)
+
+        created = [item for item in items.values() if item.pk is None]
+        fields = ["quantity", "extra", "date_updated"]
+        if BasketItem.has_save_hooks():
+            for item in updated:
+                item.save(update_fields=fields)
+            for item in created:
+                item.save(force_insert=True)
+        else:
+            if updated:
+                BasketItem.objects.bulk_update(updated, fields)
+            if created:
+                BasketItem.objects.bulk_create(created)
+        return list(items.values())
+
+    def set_items(self, entries: Iterable[dict[str, Any]]) -> list[BaseBasketItem]:
+        """
+        Set items of an unsaved basket from entries, same as in ``bulk_add()``.
+        Items are kept in memory only so that the basket can be priced without
+        any writes, eg. to quote a price for products.
+
+        Args:
+            entries (Iterable[dict]): Entries to set
+
+        Raises:
+            ValueError: If basket is saved
+
+        Returns:
+            list[BaseBasketItem]: Unsaved basket items
+        """
+        if self.pk:
+            raise ValueError("Items can only be set on an unsaved basket.")
+        items, _ = self._build_items(entries)
+        self.invalidate()
+        self._cached_items = list(items.values())
+        return self._cached_items
+
+    def _build_items(
+        self,
+        entries: Iterable[dict[str, Any]],
+    ) -> tuple[dict[str, BaseBasketItem], dict[str, dict[str, Any]]]:
+        """
+        Returns unsaved items for entries keyed by ref, with quantities of the same
+        ref merged, together with extra set by the entries keyed by ref.
+        """
+        BasketItem = get_salesman_model("BasketItem")
+        items: dict[str, BaseBasketItem] = {}
+        extras: dict[str, dict[str, Any]] = {}
+        for entry in entries:
+            product, extra = entry["product"], entry.get("extra", None)
+            ref = entry.get("ref", None) or BasketItem.get_product_ref(product)
+            if ref in items:
+                items[ref].quantity += entry.get("quantity", 1)
+            else:
+                items[ref] = BasketItem(
+                    basket=self,
+                    product=product,
+                    quantity=entry.get("quantity", 1),
+                    ref=ref,
+                    extra={},
+                )
+            if extra:
+                extras[ref] = items[ref].extra = extra
+        return items, extras
+
+    def _store_items(self, entries: Iterable[dict[str, Any]]) -> list[BaseBasketItem]:
+        """
+        Add entries to items of a basket kept in storage and save it.
+        """
+        items, extras = self._build_items(entries)
+        if self._cached_items is None:
+            self._cached_items = []
+        for ref, item in list(items.items()):
+            current = self.find(ref)
+            if current is None:
+                self._cached_items.append(item)
+                continue
+            current.quantity += item.quantity
+            current.extra = extras.get(ref, current.extra)
+            current.product = item.product
+            items[ref] = current
+        self.invalidate()
+        self.save()
+        return list(items.values())
+
+    def _upsert_item(
+        self,
+        item: BaseBasketItem,
+        using: str,
+        update_extra: bool,
+    ) -> BaseBasketItem:
+        """
+        Insert item or increase quantity of an existing one with
+        ``INSERT ... ON CONFLICT DO UPDATE`` query.
+        """
+        connection = connections[using]
+        opts, qn = item._meta, connection.ops.quote_name
+        fields = [
+            f
+            for f in opts.concrete_fields
+            if f is not opts.auto_field and not getattr(f, "generated", False)
+        ]
+        params = [
+            f.get_db_prep_save(f.pre_save(item, True), connection) for f in fields
+        ]
+        table = qn(opts.db_table)
+        columns = {f.name: qn(f.column) for f in fields}
+
+        updates = ["quantity", "date_updated"] + (["extra"] if update_extra else [])
+        assignments = [f"{columns[x]} = EXCLUDED.{columns[x]}" for x in updates]
+        assignments[0] = (
+            f"{columns['quantity']} = {table}.{columns['quantity']} "
+            f"+ EXCLUDED.{columns['quantity']}"
+        )
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns.values())}) "
+            f"VALUES ({', '.join(['%s'] * len(fields))}) "
+            f"ON CONFLICT ({columns['basket']}, {columns['ref']}) "
+            f"DO UPDATE SET {', '.join(assignments)} RETURNING *"
+        )
+        ret: BaseBasketItem = list(
+            type(item)._default_manager.db_manager(using).raw(sql, params)
+        )[0]
+        ret.product = item.product
+        return ret
+
+    def _add_item(
+        self,
+        item: BaseBasketItem,
+        using: str,
+        update_extra: bool,
+    ) -> BaseBasketItem:
+        """
+        Increase quantity of an existing item with an update query or create
+        a new one, retry the update if item was created concurrently.
+        """
+        updates: dict[str, Any] = {
+            "quantity": models.F("quantity") + item.quantity,
+            "date_updated": timezone.now(),
+        }
+        if update_extra:
+            updates["extra"] = item.extra
+
+        queryset = (
+            type(item)
+            ._default_manager.db_manager(using)
+            .filter(basket=self, ref=item.ref)
+        )
+        with transaction.atomic(using=using):
+            if not queryset.update(**updates):
+                try:
+                    with transaction.atomic(using=using):
+                        item.save(force_insert=True, using=using)
+                    return item
+                except IntegrityError:
+                    queryset.update(**updates)
+            self.update_totals()
+            ret: BaseBasketItem = queryset.get()
+        return ret
+
     def remove(self, ref: str) -> None:
         """
         Remove item with given ``ref`` from the basket.
@@ -180,9 +1172,19 @@ class BaseBasket(models.Model):
             ref (str): Item ref to remove
         """
         item = self.find(ref)
-        if item:
+        if item and self.in_storage:
+            self._cached_items = [x for x in self._cached_items or [] if x is not item]
+            self.invalidate()
+            self.save()
+        elif item:
             item.delete()
-            self._cached_items = None
+            self.invalidate()
+
+    async def aremove(self, ref: str) -> None:
+        """
+        Async version of ``remove()``.
+        """
+        await sync_to_async(self.remove)(ref)
 
     def find(self, ref: str) -> BaseBasketItem | None:
         """
@@ -195,44 +1197,121 @@ class BaseBasket(models.Model):
             Optional[BaseBasketItem]: Basket item if found.
         """
         if self._cached_items is not None:
-            try:
-                return [item for item in self._cached_items if item.ref == ref][0]
-            except IndexError:
-                return None
+            if self._cached_refs is None:
+                self._cached_refs = {item.ref: item for item in self._cached_items}
+            return self._cached_refs.get(ref, None)
         return self.items.filter(ref=ref).first()
 
     def clear(self) -> None:
         """
         Clear all items from the basket.
         """
-        self.items.all().delete()
-        self._cached_items = None
+        if self.pk:
+            with transaction.atomic():
+                self.items.all().delete()
+                self.update_totals()
+        elif self.in_storage:
+            self._cached_items = []
+            self.save()
+        self.invalidate()
+
+    async def aclear(self) -> None:
+        """
+        Async version of ``clear()``.
+        """
+        await sync_to_async(self.clear)()
 
     @transaction.atomic
     def merge(self, other: BaseBasket) -> None:
         """
         Merge other basket with this one, delete afterwards.
+        Uses a constant number of queries regardless of the item count.
 
         Args:
             other (Basket): Basket which to merge
         """
-        for item in other:
-            try:
-                existing = self.items.get(ref=item.ref)
-                existing.quantity += item.quantity
-                existing.save(update_fields=["quantity"])
-            except item.DoesNotExist:
-                item.basket = self
-                item.save(update_fields=["basket"])
+        self.promote()
+        self.save_lazy()
+        quantities = dict(other.items.values_list("ref", "quantity"))
+        existing = set(
+            self.items.filter(ref__in=quantities).values_list("ref", flat=True)
+        )
+
+        if existing:
+            # Increase quantities of matching items in a single update.
+            whens = [
+                models.When(ref=ref, then=models.Value(quantities[ref]))
+                for ref in existing
+            ]
+            self.items.filter(ref__in=existing).update(
+                quantity=models.F("quantity")
+                + models.Case(*whens, output_field=models.PositiveIntegerField())
+            )
+        if len(existing) < len(quantities):
+            # Move the rest of the items to this basket.
+            other.items.exclude(ref__in=existing).update(basket=self)
+
         other.delete()
-        self._cached_items = None
+        self.update_totals()
+        self.invalidate()
+
+    async def amerge(self, other: BaseBasket) -> None:
+        """
+        Async version of ``merge()``, runs in a thread since the items are
+        merged in a transaction.
+        """
+        await sync_to_async(self.merge)(other)
 
     def get_items(self) -> list[BaseBasketItem]:
         """
-        Returns items from cache or stores new ones.
+        Returns items from cache or stores new ones. Products are loaded in bulk
+        for items that don't have them loaded yet.
         """
         if self._cached_items is None:
-            self._cached_items = list(self.items.all().prefetch_related("product"))
+            self._cached_items = list(self.items.all())
+        get_salesman_model("BasketItem").load_products(self._cached_items)
+        return self._cached_items
+
+    def update_totals(self) -> None:
+        """
+        Update ``item_count`` and ``total_quantity`` of a saved basket from its items
+        with a single query, also setting ``date_updated``. Called by basket methods
+        and item saves that change the items, should be called when items are
+        changed with queryset methods. Values are loaded again from the database
+        when accessed.
+        """
+        if not self.pk:
+            return
+        type(self)._default_manager.filter(pk=self.pk).update(**self._get_totals())
+        # Defer the fields so that they're loaded when accessed.
+        self.__dict__.pop("item_count", None)
+        self.__dict__.pop("total_quantity", None)
+
+    def _get_totals(self) -> dict[str, Any]:
+        """
+        Returns values set by ``update_totals()``, computed with subqueries.
+        """
+        items = (
+            self.items.model._default_manager.filter(basket=models.OuterRef("pk"))
+            .order_by()
+            .values("basket")
+        )
+        count = items.annotate(value=models.Count("pk")).values("value")
+        quantity = items.annotate(value=models.Sum("quantity")).values("value")
+        self.date_updated = timezone.now()
+        return {
+            "item_count": Coalesce(models.Subquery(count), 0),
+            "total_quantity": Coalesce(models.Subquery(quantity), 0),
+            "date_updated": self.date_updated,
+        }
+
+    async def aget_items(self) -> list[BaseBasketItem]:
+        """
+        Async version of ``get_items()``.
+        """
+        if self._cached_items is None:
+            self._cached_items = [item async for item in self.items.all()]
+        await get_salesman_model("BasketItem").aload_products(self._cached_items)
         return self._cached_items
 
     @property
@@ -242,7 +1321,7 @@ class BaseBasket(models.Model):
         """
         if self._cached_items is not None:
             return len(self._cached_items)
-        return self.items.count()
+        return self.item_count
 
     @property
     def quantity(self) -> int:
@@ -251,8 +1330,7 @@ class BaseBasket(models.Model):
         """
         if self._cached_items is not None:
             return sum([item.quantity for item in self._cached_items])
-        aggr = self.items.aggregate(quantity=models.Sum("quantity"))
-        return aggr["quantity"] or 0
+        return self.total_quantity
 
 
 class Basket(BaseBasket):
@@ -300,9 +1378,46 @@ class BaseBasketItem(models.Model):
         # Set default ref.
         if not self.ref and self.product:
             self.ref = self.get_product_ref(self.product)
-        super().save(*args, **kwargs)
+        basket = self.get_stored_basket()
+        if basket is not None:
+            basket.save()
+            return
+        with transaction.atomic(using=kwargs.get("using", None)):
+            super().save(*args, **kwargs)
+            self.basket.update_totals()
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        basket = self.get_stored_basket()
+        if basket is not None:
+            basket.remove(self.ref)
+            return 1, {self._meta.label: 1}
+        basket = self.basket
+        with transaction.atomic(using=kwargs.get("using", None)):
+            ret = super().delete(*args, **kwargs)
+            basket.update_totals()
+        return ret
 
-    def update(self, request: HttpRequest) -> None:
+    @classmethod
+    def has_save_hooks(cls) -> bool:
+        """
+        Returns True if saving an item runs custom code, either an overridden
+        ``save()`` method or ``post_save`` signal receivers. Such items are
+        created with ``save()`` instead of an upsert query.
+        """
+        return (
+            cls.save is not BaseBasketItem.save
+            or models.signals.post_save.has_listeners(cls)
+        )
+
+    def get_stored_basket(self) -> BaseBasket | None:
+        """
+        Returns basket of this item if it's kept in ``SALESMAN_BASKET_STORAGE``,
+        in which case writes to the item are saved to the storage.
+        """
+        basket: BaseBasket | None = self._state.fields_cache.get("basket", None)
+        return basket if basket is not None and basket.in_storage else None
+
+    def update(self, request: HttpRequest, price: Decimal | None = None) -> None:
         """
         Process items with modifiers defined in ``SALESMAN_BASKET_MODIFIERS``.
         This method sets ``unit_price``, ``subtotal``, ``total`` and ``extra_rows``
@@ -311,19 +1426,79 @@ class BaseBasketItem(models.Model):
 
         Args:
             request (HttpRequest): Django request
+            price (Decimal, optional): Product price when already known.
         """
         from .modifiers import basket_modifiers_pool
 
-        self.extra_rows: dict[str, Any] = OrderedDict()
-        if self.product:
-            self.unit_price = Decimal(self.product.get_price(request))
+        self.set_unit_price(request, price=price)
+        for (process_item,) in basket_modifiers_pool.get_hooks("process_item"):
+            if process_item:
+                process_item(self, request)
+
+    def set_unit_price(
+        self, request: HttpRequest, price: Decimal | None = None
+    ) -> None:
+        """
+        Set ``unit_price``, ``subtotal`` and ``total`` from the product price
+        and reset ``extra_rows`` on the item, before it's processed by modifiers.
+
+        Args:
+            request (HttpRequest): Django request
+            price (Decimal, optional): Product price when already known.
+        """
+        self.extra_rows: dict[str, ExtraRow] = OrderedDict()
+        if price is not None:
+            self.unit_price = to_amount(price)
+        elif self.product:
+            self.unit_price = to_amount(self.product.get_price(request))
         else:
-            self.unit_price = Decimal(0)
+            self.unit_price = to_amount(0)
         self.subtotal = self.unit_price * self.quantity
         self.total = self.subtotal
 
-        for modifier in basket_modifiers_pool.get_modifiers():
-            modifier.process_item(self, request)
+    def get_pricing_key(self) -> list[Any]:
+        """
+        Returns item values that affect its price. Item is processed again
+        when the key differs from the one stored with its previous results.
+        """
+        return [
+            self.product_content_type_id,
+            self.product_id,
+            self.quantity,
+            self.extra,
+        ]
+
+    def get_pricing_data(self) -> dict[str, Any]:
+        """
+        Returns computed item values in a form that can be stored as JSON,
+        together with the item pricing key. Item must be updated before
+        calling this method.
+
+        Returns:
+            dict: Pricing data
+        """
+        return {
+            "key": self.get_pricing_key(),
+            "unit_price": self.unit_price,
+            "subtotal": self.subtotal,
+            "total": self.total,
+            "extra_rows": {k: row.to_dict() for k, row in self.extra_rows.items()},
+        }
+
+    def set_pricing_data(self, data: dict[str, Any]) -> None:
+        """
+        Set computed item values from data returned by ``get_pricing_data()``
+        without running the modifiers.
+
+        Args:
+            data (dict): Pricing data
+        """
+        self.unit_price = coerce_amount(data["unit_price"])
+        self.subtotal = coerce_amount(data["subtotal"])
+        self.total = coerce_amount(data["total"])
+        self.extra_rows = OrderedDict(
+            (k, ExtraRow.from_dict(row)) for k, row in data["extra_rows"].items()
+        )
 
     @property
     def name(self) -> str:
@@ -339,6 +1514,63 @@ class BaseBasketItem(models.Model):
         """
         return str(self.product.code) if self.product else "(no code)"
 
+    @classmethod
+    def load_products(cls, items: list[BaseBasketItem]) -> None:
+        """
+        Load products for given items using one query per product type.
+        Querysets are tuned with options from ``SALESMAN_PRODUCT_TYPES`` setting.
+        Items that already have the product loaded are skipped.
+
+        Args:
+            items (list[BaseBasketItem]): Basket items
+        """
+        from .utils import get_product_queryset
+
+        field = cls._meta.get_field("product")
+        pending: dict[int, list[BaseBasketItem]] = defaultdict(list)
+        for item in items:
+            if not field.is_cached(item):
+                pending[item.product_content_type_id].append(item)
+
+        for content_type_id, group in pending.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            products = {}
+            if model is not None:
+                queryset = get_product_queryset(model)
+                products = queryset.in_bulk({item.product_id for item in group})
+            for item in group:
+                product = products.get(item.product_id, None)
+                field.set_cached_value(item, product)
+
+    @classmethod
+    async def aload_products(cls, items: list[BaseBasketItem]) -> None:
+        """
+        Async version of ``load_products()``.
+        """
+        from .utils import get_product_queryset
+
+        field = cls._meta.get_field("product")
+        pending: dict[int, list[BaseBasketItem]] = defaultdict(list)
+        for item in items:
+            if not field.is_cached(item):
+                pending[item.product_content_type_id].append(item)
+
+        for content_type_id, group in pending.items():
+            try:
+                content_type = ContentType.objects.get_for_id(content_type_id)
+            except SynchronousOnlyOperation:
+                # Not cached yet, load and cache it in a thread.
+                get_for_id = sync_to_async(ContentType.objects.get_for_id)
+                content_type = await get_for_id(content_type_id)
+            model = content_type.model_class()
+            products = {}
+            if model is not None:
+                queryset = get_product_queryset(model)
+                products = await queryset.ain_bulk({item.product_id for item in group})
+            for item in group:
+                product = products.get(item.product_id, None)
+                field.set_cached_value(item, product)
+
     @classmethod
     def get_product_ref(cls, product: Product) -> str:
         """
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import Any, List
+from functools import partial
+from typing import Any, Callable, List, Sequence
 
+from django.db import connections
 from django.http import HttpRequest
 
 from salesman.conf import app_settings
+from salesman.core.money import coerce_amount
+from salesman.core.utils import get_salesman_cache
 
-from .models import BaseBasket, BaseBasketItem
-from .serializers import ExtraRowSerializer
+from .columns import ItemColumns
+from .models import BaseBasket, BaseBasketItem, ExtraRow
+from .profiling import get_profile, profile_hook
+from .utils import bump_modifier_version, get_modifier_cache_key
 
 
 class BasketModifier:
@@ -21,6 +29,54 @@ class BasketModifier:
 
     identifier: str
 
+    # Set to True when ``process_item`` only depends on the item itself and the
+    # request, so that results of unchanged items can be reused when the basket
+    # is priced again.
+    item_local: bool = False
+
+    # Set to True when ``prefetch`` is I/O-bound and independent of other modifiers,
+    # to run it concurrently with other such modifiers in a thread pool.
+    concurrent: bool = False
+
+    # Seconds to wait for concurrent ``prefetch`` before ``prefetch_fallback`` is used.
+    prefetch_timeout: float | None = None
+
+    # Seconds to keep results cached when ``get_cache_key`` returns a key.
+    cache_timeout: int | None = 300
+
+    def prefetch(self, basket: BaseBasket, request: HttpRequest) -> Any:
+        """
+        Fetch data required for processing, eg. from an external service. Returned
+        value is available in other methods as ``basket.prefetched[self.identifier]``.
+
+        Args:
+            basket (BaseBasket): Basket instance
+            request (HttpRequest): Django request
+
+        Returns:
+            Any: Prefetched data
+        """
+
+    def prefetch_fallback(
+        self,
+        basket: BaseBasket,
+        request: HttpRequest,
+        error: Exception,
+    ) -> Any:
+        """
+        Returns a value used when ``prefetch`` fails or times out. Re-raises the
+        error by default.
+
+        Args:
+            basket (BaseBasket): Basket instance
+            request (HttpRequest): Django request
+            error (Exception): Raised error, ``TimeoutError`` if timed out
+
+        Returns:
+            Any: Fallback data
+        """
+        raise error
+
     def setup_basket(self, basket: BaseBasket, request: HttpRequest) -> None:
         """
         Initial modifier Basket setup before any processing.
@@ -48,6 +104,17 @@ class BasketModifier:
             request (HttpRequest): Django request
         """
 
+    def process_items(self, columns: ItemColumns, request: HttpRequest) -> None:
+        """
+        Process all items at once using column values, eg. for baskets with many
+        items. When overridden it's called instead of ``process_item``. Add extra
+        rows to items using ``self.add_column_rows()`` method.
+
+        Args:
+            columns (ItemColumns): Item values stored as columns
+            request (HttpRequest): Django request
+        """
+
     def finalize_item(self, item: BaseBasketItem, request: HttpRequest) -> None:
         """
         Finalize item after after all items were already processed.
@@ -75,6 +142,88 @@ class BasketModifier:
             request (HttpRequest): Django request
         """
 
+    def get_request_key(self, request: HttpRequest) -> str:
+        """
+        Returns a key for parts of the request this modifier depends on, eg. user
+        group or shipping country. Key is included in the basket fingerprint when
+        ``SALESMAN_BASKET_SNAPSHOT`` is enabled. Defaults to an empty string.
+
+        Args:
+            request (HttpRequest): Django request
+
+        Returns:
+            str: Request key
+        """
+        return ""
+
+    def get_cache_key(
+        self,
+        obj: BaseBasket | BaseBasketItem,
+        request: HttpRequest,
+    ) -> str | None:
+        """
+        Returns a key built from the inputs ``process_item`` or ``process_basket``
+        depend on, eg. shipping country and total weight. When a key is returned
+        the extra rows added by the method are stored in ``SALESMAN_CACHE`` and
+        reused for the same key without calling the method. Cached methods should
+        only change the basket or item using ``self.add_extra_row()``.
+        Defaults to ``None`` which disables caching.
+
+        Args:
+            obj (BasketOrItem): Basket or BasketItem instance
+            request (HttpRequest): Django request
+
+        Returns:
+            Optional[str]: Cache key
+        """
+        return None
+
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        """
+        Invalidate all cached results of this modifier.
+        """
+        bump_modifier_version(cls.identifier)
+
+    def call_cached(
+        self,
+        method: Callable[..., None],
+        obj: BaseBasket | BaseBasketItem,
+        request: HttpRequest,
+    ) -> None:
+        """
+        Call processing method, or add extra rows from the cache when available
+        for the key returned from ``get_cache_key()``.
+
+        Args:
+            method (Callable): Bound ``process_item`` or ``process_basket`` method
+            obj (BasketOrItem): Basket or BasketItem instance
+            request (HttpRequest): Django request
+        """
+        key = self.get_cache_key(obj, request)
+        if key is None:
+            method(obj, request)
+            return
+
+        cache = get_salesman_cache()
+        cache_key = get_modifier_cache_key(self.identifier, method.__name__, key)
+        rows = cache.get(cache_key)
+        if rows is None:
+            before = dict(obj.extra_rows)
+            method(obj, request)
+            rows = [
+                (identifier, row.to_dict())
+                for identifier, row in obj.extra_rows.items()
+                if before.get(identifier, None) is not row
+            ]
+            cache.set(cache_key, rows, self.cache_timeout)
+            return
+
+        for identifier, data in rows:
+            row = obj.extra_rows[identifier] = ExtraRow.from_dict(data)
+            if row.charge:
+                obj.total += coerce_amount(row.amount)
+
     def add_extra_row(
         self,
         obj: BaseBasket | BaseBasketItem,
@@ -100,11 +249,38 @@ class BasketModifier:
         if not identifier:
             identifier = self.identifier
 
-        instance = {"label": label, "amount": amount, "extra": extra}
-        context = {"request": request}
-        obj.extra_rows[identifier] = ExtraRowSerializer(instance, context=context)
+        value = coerce_amount(amount)
+        obj.extra_rows[identifier] = ExtraRow(label, value, extra, charge)
         if charge:
-            obj.total += Decimal(amount)
+            obj.total += value
+
+    def add_column_rows(
+        self,
+        columns: ItemColumns,
+        request: HttpRequest,
+        label: str,
+        amounts: Sequence[Any],
+        mask: Sequence[bool] | None = None,
+        extra: dict[str, Any] = {},
+        charge: bool = True,
+        identifier: str | None = None,
+    ) -> None:
+        """
+        Adds extra row to items in columns, with an amount for each item.
+
+        Args:
+            columns (ItemColumns): Item columns
+            request (HttpRequest): Django request
+            label (str): Row label
+            amounts (Sequence): Row amount for each item, skipped when None
+            mask (Sequence[bool], optional): Items to add the row to. Defaults to all.
+            extra (dict, optional): Row extra data. Defaults to {}.
+            charge (bool, optional): Whether to charge the amount. Defaults to True.
+            identifier (Optional[str], optional): Extra row ID. Defaults to modifier ID.
+        """
+        if not identifier:
+            identifier = self.identifier
+        columns.add_rows(identifier, label, amounts, mask, extra, charge)
 
 
 class BasketModifiersPool:
@@ -114,6 +290,9 @@ class BasketModifiersPool:
 
     def __init__(self) -> None:
         self._modifiers: list[BasketModifier] | None = None
+        self._hooks: dict[
+            tuple[str, ...], list[tuple[Callable[..., None] | None, ...]]
+        ] = {}
 
     def get_modifiers(self) -> List[BasketModifier]:
         """
@@ -124,7 +303,169 @@ class BasketModifiersPool:
         """
         if self._modifiers is None:
             self._modifiers = [M() for M in app_settings.SALESMAN_BASKET_MODIFIERS]
+            self._hooks = {}
         return self._modifiers
 
+    def is_item_local(self) -> bool:
+        """
+        Returns True when all modifiers that process items are ``item_local``.
+        """
+        return all(
+            modifier.item_local
+            for modifier in self.get_modifiers()
+            if type(modifier).process_item is not BasketModifier.process_item
+            or type(modifier).process_items is not BasketModifier.process_items
+        )
+
+    def has_column_hooks(self) -> bool:
+        """
+        Returns True when any modifier processes items as columns.
+        """
+        return any(
+            type(modifier).process_items is not BasketModifier.process_items
+            for modifier in self.get_modifiers()
+        )
+
+    def prefetch(self, basket: BaseBasket, request: HttpRequest) -> dict[str, Any]:
+        """
+        Runs ``prefetch`` on modifiers that override it and returns results keyed
+        by modifier identifier. Modifiers marked as ``concurrent`` are run in a
+        thread pool while the rest are run in order.
+
+        Args:
+            basket (BaseBasket): Basket instance
+            request (HttpRequest): Django request
+
+        Returns:
+            dict: Prefetched data
+        """
+        modifiers = [
+            modifier
+            for modifier in self.get_modifiers()
+            if type(modifier).prefetch is not BasketModifier.prefetch
+        ]
+        if not modifiers:
+            return {}
+
+        durations: dict[str, float] = {}
+
+        def call(modifier: BasketModifier) -> Any:
+            start = time.perf_counter()
+            try:
+                return modifier.prefetch(basket, request)
+            finally:
+                durations[modifier.identifier] = time.perf_counter() - start
+
+        def run(modifier: BasketModifier) -> Any:
+            try:
+                return call(modifier)
+            finally:
+                # Close connections opened in the worker thread.
+                connections.close_all()
+
+        ret = {}
+        concurrent = [modifier for modifier in modifiers if modifier.concurrent]
+        executor = None
+        if concurrent:
+            executor = ThreadPoolExecutor(len(concurrent), "salesman-prefetch")
+            start = time.monotonic()
+            futures = [(m, executor.submit(run, m)) for m in concurrent]
+
+        try:
+            for modifier in modifiers:
+                if modifier.concurrent:
+                    continue
+                try:
+                    ret[modifier.identifier] = call(modifier)
+                except Exception as e:
+                    value = modifier.prefetch_fallback(basket, request, e)
+                    ret[modifier.identifier] = value
+
+            if executor:
+                # Wait for results with the earliest deadline first.
+                futures.sort(
+                    key=lambda x: (x[0].prefetch_timeout is None, x[0].prefetch_timeout)
+                )
+                for modifier, future in futures:
+                    timeout = modifier.prefetch_timeout
+                    if timeout is not None:
+                        timeout = max(start + timeout - time.monotonic(), 0)
+                    try:
+                        ret[modifier.identifier] = future.result(timeout)
+                    except Exception as e:
+                        value = modifier.prefetch_fallback(basket, request, e)
+                        ret[modifier.identifier] = value
+        finally:
+            if executor:
+                # Don't wait for timed out threads to finish.
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        profile = get_profile()
+        if profile:
+            for identifier, duration in list(durations.items()):
+                profile.record(identifier, "prefetch", duration, 0)
+
+        # Keep the modifier order.
+        return {m.identifier: ret[m.identifier] for m in modifiers}
+
+    def get_hooks(self, *names: str) -> list[tuple[Callable[..., None] | None, ...]]:
+        """
+        Returns bound hook methods with given names for modifiers that override
+        at least one of them, in modifier order. Hooks that are not overridden
+        are set to ``None``. Result is computed once per hook names. Hooks are
+        wrapped to record their calls while basket pricing is profiled.
+
+        Args:
+            *names (str): Hook method names, eg. ``"setup_basket"``
+
+        Returns:
+            list: Tuples of hook methods for each modifier
+        """
+        modifiers = self.get_modifiers()
+        profiled = get_profile() is not None
+        key = (*names, "profiled") if profiled else names
+        if key not in self._hooks:
+            hooks = []
+            for modifier in modifiers:
+                methods = tuple(
+                    self.get_hook(modifier, name, profiled)
+                    if getattr(type(modifier), name)
+                    is not getattr(BasketModifier, name)
+                    else None
+                    for name in names
+                )
+                if any(methods):
+                    hooks.append(methods)
+            self._hooks[key] = hooks
+        return self._hooks[key]
+
+    def get_hook(
+        self,
+        modifier: BasketModifier,
+        name: str,
+        profiled: bool = False,
+    ) -> Callable[..., None]:
+        """
+        Returns bound hook method for modifier. Processing methods are wrapped
+        to use cached results when modifier defines ``get_cache_key``.
+
+        Args:
+            modifier (BasketModifier): Modifier instance
+            name (str): Hook method name
+            profiled (bool, optional): Wrap hook to record its calls in the profile
+
+        Returns:
+            Callable: Hook method
+        """
+        method: Callable[..., None] = getattr(modifier, name)
+        if (
+            name in ["process_item", "process_basket"]
+            and type(modifier).get_cache_key is not BasketModifier.get_cache_key
+        ):
+            method = partial(modifier.call_cached, method)
+        if profiled:
+            method = profile_hook(modifier.identifier, name, method)
+        return method
+
 
 basket_modifiers_pool = BasketModifiersPool()
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Generator
+
+from django.db import connections
+from django.http import HttpRequest
+
+from salesman.conf import app_settings
+from salesman.core.money import to_decimal
+from salesman.core.utils import get_salesman_cache
+
+from .signals import basket_priced
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .models import BaseBasket
+
+STATS_CACHE_KEY = "salesman:modifier-stats:{key}"
+BASKET_PHASES = ["setup_basket", "process_basket", "finalize_basket"]
+
+_current_profile: ContextVar[PricingProfile | None] = ContextVar(
+    "salesman_pricing_profile", default=None
+)
+_explain_profile: ContextVar[PricingProfile | None] = ContextVar(
+    "salesman_explain_profile", default=None
+)
+
+
+class PricingProfile:
+    """
+    Modifier timings, call counts and extra rows collected
+    per modifier and phase during a single basket pricing.
+
+    In ``explain`` mode queries issued by each call and the running
+    basket total after basket level calls are collected as well.
+    """
+
+    def __init__(self, explain: bool = False) -> None:
+        self.explain = explain
+        # Values for each ``(modifier, phase)`` as
+        # ``[calls, seconds, rows, queries, total]``.
+        self.entries: dict[tuple[str, str], list[Any]] = {}
+
+    def record(
+        self,
+        modifier: str,
+        phase: str,
+        duration: float,
+        rows: int,
+        queries: int = 0,
+        total: Any = None,
+    ) -> None:
+        """
+        Record a single modifier call.
+
+        Args:
+            modifier (str): Modifier identifier
+            phase (str): Modifier method name
+            duration (float): Call duration in seconds
+            rows (int): Number of extra rows added
+            queries (int, optional): Number of queries issued. Defaults to 0.
+            total (Decimal, optional): Basket total after the call. Defaults to None.
+        """
+        entry = self.entries.setdefault((modifier, phase), [0, 0.0, 0, 0, None])
+        entry[0] += 1
+        entry[1] += duration
+        entry[2] += rows
+        entry[3] += queries
+        if total is not None:
+            entry[4] = total
+
+    def to_list(self) -> list[dict[str, Any]]:
+        """
+        Returns profile entries in order of recording.
+        """
+        ret = []
+        for (modifier, phase), (calls, duration, rows, queries, total) in list(
+            self.entries.items()
+        ):
+            entry = {
+                "modifier": modifier,
+                "phase": phase,
+                "calls": calls,
+                "time": duration,
+                "rows": rows,
+            }
+            if self.explain:
+                entry.update(queries=queries, total=total)
+            ret.append(entry)
+        return ret
+
+
+def get_profile() -> PricingProfile | None:
+    """
+    Returns profile for the basket pricing in progress, if profiling is enabled.
+    """
+    return _current_profile.get()
+
+
+def is_profiling_enabled() -> bool:
+    """
+    Returns True when basket pricing should be profiled, either when
+    ``SALESMAN_BASKET_PROFILING`` is enabled or ``basket_priced`` has receivers.
+    """
+    return app_settings.SALESMAN_BASKET_PROFILING or basket_priced.has_listeners()
+
+
+def is_explaining() -> bool:
+    """
+    Returns True when basket pricing is explained, in which case stored
+    snapshots and item results are not used.
+    """
+    return _explain_profile.get() is not None
+
+
+def is_explain_request(request: HttpRequest) -> bool:
+    """
+    Returns True when pricing explain is requested by staff with ``?explain``.
+
+    Args:
+        request (HttpRequest): Django request
+
+    Returns:
+        bool: True if explain is requested
+    """
+    user = getattr(request, "user", None)
+    return "explain" in request.GET and bool(user and user.is_staff)
+
+
+def explain_pricing(basket: BaseBasket, request: HttpRequest) -> dict[str, Any]:
+    """
+    Price the basket again with explain profiling and return the breakdown
+    with time spent, queries issued, extra rows added and the running
+    basket total for each modifier and phase.
+
+    Args:
+        basket (BaseBasket): Basket instance
+        request (HttpRequest): Django request
+
+    Returns:
+        dict: Pricing explain data
+    """
+    profile = PricingProfile(explain=True)
+    token = _explain_profile.set(profile)
+    start = time.perf_counter()
+    try:
+        basket.invalidate()
+        basket.update(request)
+    finally:
+        _explain_profile.reset(token)
+
+    def format_price(value: Any) -> str | None:
+        if value is None:
+            return None
+        context = {"request": request}
+        return app_settings.SALESMAN_PRICE_FORMATTER(to_decimal(value), context=context)
+
+    modifiers = profile.to_list()
+    for entry in modifiers:
+        entry["total"] = format_price(entry["total"])
+    return {
+        "time": time.perf_counter() - start,
+        "subtotal": format_price(basket.subtotal),
+        "total": format_price(basket.total),
+        "modifiers": modifiers,
+    }
+
+
+def profile_hook(
+    modifier: str,
+    phase: str,
+    hook: Callable[..., None],
+) -> Callable[..., None]:
+    """
+    Returns modifier hook wrapped to record its calls in the current profile.
+
+    Args:
+        modifier (str): Modifier identifier
+        phase (str): Modifier method name
+        hook (Callable): Bound modifier method
+
+    Returns:
+        Callable: Wrapped hook
+    """
+
+    def wrapper(obj: Any, request: HttpRequest) -> None:
+        profile = _current_profile.get()
+        if profile is None:
+            return hook(obj, request)
+        if profile.explain:
+            return explain_hook(profile, obj, request)
+        rows = len(getattr(obj, "extra_rows", ()))
+        start = time.perf_counter()
+        try:
+            return hook(obj, request)
+        finally:
+            rows = len(getattr(obj, "extra_rows", ())) - rows
+            profile.record(modifier, phase, time.perf_counter() - start, rows)
+
+    def explain_hook(profile: PricingProfile, obj: Any, request: HttpRequest) -> None:
+        queries = 0
+
+        def count_queries(execute: Callable[..., Any], *args: Any) -> Any:
+            nonlocal queries
+            queries += 1
+            return execute(*args)
+
+        rows = len(getattr(obj, "extra_rows", ()))
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(count_queries))
+                return hook(obj, request)
+        finally:
+            duration = time.perf_counter() - start
+            rows = len(getattr(obj, "extra_rows", ())) - rows
+            total = getattr(obj, "total", None) if phase in BASKET_PHASES else None
+            profile.record(modifier, phase, duration, rows, queries, total)
+
+    return wrapper
+
+
+@contextmanager
+def profile_pricing(
+    basket: BaseBasket,
+    request: HttpRequest,
+) -> Generator[PricingProfile | None, None, None]:
+    """
+    Context manager used to profile basket pricing when profiling is enabled
+    or the pricing is explained.
+    Collected profile is added to ``modifier_stats`` when ``SALESMAN_BASKET_PROFILING``
+    is enabled and is sent with the ``basket_priced`` signal.
+
+    Args:
+        basket (BaseBasket): Basket instance
+        request (HttpRequest): Django request
+
+    Yields:
+        Optional[PricingProfile]: Profile or None if profiling is disabled
+    """
+    profile = _explain_profile.get()
+    if profile is None:
+        if not is_profiling_enabled():
+            yield None
+            return
+        profile = PricingProfile()
+
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+    if app_settings.SALESMAN_BASKET_PROFILING:
+        modifier_stats.record(profile)
+    basket_priced.send(
+        sender=type(basket),
+        basket=basket,
+        request=request,
+        profile=profile,
+    )
+
+
+class ModifierStats:
+    """
+    Collector that aggregates pricing profiles in ``SALESMAN_CACHE``,
+    so that stats can be read from other processes. Stats of each modifier
+    are stored under a single key as ``{phase: [calls, microseconds, rows]}``.
+    """
+
+    def get_key(self, modifier: str) -> str:
+        """
+        Returns cache key for stats of the given modifier.
+        """
+        return STATS_CACHE_KEY.format(key=f"modifier:{modifier}")
+
+    def record(self, profile: PricingProfile) -> None:
+        """
+        Add profile values to the collected stats with one read and one write.
+        Writes are not atomic, stats of pricings that finish at the same time
+        in other processes may be lost.
+
+        Args:
+            profile (PricingProfile): Pricing profile
+        """
+        values: dict[str, dict[str, list[int]]] = {}
+        for (modifier, phase), (calls, duration, rows, *_) in profile.entries.items():
+            values.setdefault(modifier, {})[phase] = [calls, int(duration * 1e6), rows]
+        if not values:
+            return
+
+        cache = get_salesman_cache()
+        keys_key = STATS_CACHE_KEY.format(key="keys")
+        keys = {self.get_key(modifier): modifier for modifier in values}
+        stored = cache.get_many([keys_key, *keys])
+        data: dict[str, Any] = {}
+        for key, modifier in keys.items():
+            phases = stored.get(key, {})
+            for phase, entry in values[modifier].items():
+                current = phases.get(phase, [0, 0, 0])
+                phases[phase] = [x + y for x, y in zip(current, entry)]
+            data[key] = phases
+        known = set(stored.get(keys_key, []))
+        if values.keys() - known:
+            data[keys_key] = sorted(known | values.keys())
+        cache.set_many(data, None)
+
+    def get_stats(self) -> list[dict[str, Any]]:
+        """
+        Returns collected stats for each modifier and phase. Time is in seconds.
+        """
+        cache = get_salesman_cache()
+        modifiers = cache.get(STATS_CACHE_KEY.format(key="keys"), [])
+        stored = cache.get_many([self.get_key(x) for x in modifiers])
+        ret = []
+        for modifier in modifiers:
+            phases = stored.get(self.get_key(modifier), {})
+            for phase, (calls, duration, rows) in sorted(phases.items()):
+                ret.append(
+                    {
+                        "modifier": modifier,
+                        "phase": phase,
+                        "calls": calls,
+                        "time": duration / 1e6,
+                        "rows": rows,
+                    }
+                )
+        return ret
+
+    def reset(self) -> None:
+        """
+        Clear collected stats.
+        """
+        cache = get_salesman_cache()
+        keys_key = STATS_CACHE_KEY.format(key="keys")
+        keys = [self.get_key(x) for x in cache.get(keys_key, [])]
+        cache.delete_many([keys_key, *keys])
+
+
+modifier_stats = ModifierStats()
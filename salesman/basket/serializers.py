@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from typing import Any
 
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
-from salesman.basket.models import BaseBasket, BaseBasketItem
+from salesman.basket.models import BaseBasket, BaseBasketItem, ExtraRow
+from salesman.basket.utils import get_product_queryset
 from salesman.conf import app_settings
 from salesman.core.serializers import PriceField
 from salesman.core.typing import Product
@@ -33,20 +36,28 @@ class ProductField(serializers.Serializer):
 
 class ExtraRowsField(serializers.Serializer):
     """
-    Field to display a list of ``ExtraRowSerializer`` instances.
+    Field to display a list of ``ExtraRow`` instances.
     """
 
     def to_representation(
         self,
-        rows: dict[str, ExtraRowSerializer],
+        rows: dict[str, ExtraRow | ExtraRowSerializer],
     ) -> list[dict[str, Any]]:
-        return [dict(row.data, modifier=modifier) for modifier, row in rows.items()]
+        serializer = ExtraRowSerializer(context=self.context)
+        ret = []
+        for modifier, row in rows.items():
+            if isinstance(row, ExtraRowSerializer):
+                data = row.data
+            else:
+                data = serializer.to_representation(row)
+            ret.append(dict(data, modifier=modifier))
+        return ret
 
 
 class ExtraRowSerializer(serializers.Serializer):
     """
-    Extra row serializer used for adding extra data to ``extra_rows`` dict on
-    both the basket and basket item model. Mostly used when processing basket modifiers.
+    Extra row serializer used for rendering ``ExtraRow`` instances from ``extra_rows``
+    dict on both the basket and basket item model.
     """
 
     label = serializers.CharField(read_only=True, default="")
@@ -112,11 +123,54 @@ class BasketItemSerializer(serializers.ModelSerializer):
 
     def to_representation(self, item: BaseBasketItem) -> Any:
         basket, request = self.context["basket"], self.context["request"]
-        basket.update(request)
+        basket.ensure_priced(request)
         item = basket.find(item.ref)
         return super().to_representation(item)
 
 
+class BasketItemCreateListSerializer(serializers.ListSerializer):
+    """
+    Serializer used to add many items to basket at once. Products are loaded
+    with one query per product type and items are written in bulk.
+    """
+
+    products: dict[tuple[str, int], Product] | None = None
+
+    def to_internal_value(self, data: Any) -> list[dict[str, Any]]:
+        self.products = self.get_products(data)
+        value: list[dict[str, Any]] = super().to_internal_value(data)
+        return value
+
+    def get_products(self, data: Any) -> dict[tuple[str, int], Product]:
+        """
+        Returns products referenced in data keyed by ``(product_type, product_id)``.
+        """
+        ids: dict[str, set[int]] = defaultdict(set)
+        for entry in data if isinstance(data, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            product_type = entry.get("product_type", None)
+            if product_type in app_settings.SALESMAN_PRODUCT_TYPES:
+                try:
+                    ids[product_type].add(int(entry.get("product_id", None)))
+                except (TypeError, ValueError):
+                    pass
+
+        products = {}
+        for product_type, product_ids in ids.items():
+            model = apps.get_model(product_type)
+            for pid, product in (
+                get_product_queryset(model).in_bulk(product_ids).items()
+            ):
+                products[(product_type, pid)] = product
+        return products
+
+    def create(self, validated_data: list[dict[str, Any]]) -> list[BaseBasketItem]:
+        basket = self.context["basket"]
+        items: list[BaseBasketItem] = basket.bulk_add(validated_data)
+        return items
+
+
 class BasketItemCreateSerializer(serializers.ModelSerializer):
     """
     Serializer used to add a new item to basket.
@@ -135,16 +189,12 @@ class BasketItemCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = BasketItem
         fields = ["ref", "product_type", "product_id", "quantity", "extra"]
+        list_serializer_class = BasketItemCreateListSerializer
 
     def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
         # Validate and set product from generic relation.
-        app_label, model_name = attrs["product_type"].split(".")
-        model = apps.get_model(app_label, model_name)
-        content_type = ContentType.objects.get_for_model(model)
-        try:
-            pid = attrs["product_id"]
-            attrs["product"] = content_type.get_object_for_this_type(id=pid)
-        except ObjectDoesNotExist:
+        attrs["product"] = self.get_product(attrs["product_type"], attrs["product_id"])
+        if attrs["product"] is None:
             msg = _("Product '{product_type}' with id '{product_id}' doesn't exist.")
             raise serializers.ValidationError(msg.format(**attrs))
 
@@ -153,6 +203,24 @@ class BasketItemCreateSerializer(serializers.ModelSerializer):
         context["basket_item"] = self.instance
         return app_settings.SALESMAN_BASKET_ITEM_VALIDATOR(attrs, context=context)
 
+    def get_product(self, product_type: str, product_id: int) -> Product | None:
+        """
+        Returns product for given type and id, uses products
+        loaded by the parent serializer when adding many items.
+        """
+        products = getattr(self.parent, "products", None)
+        if products is not None:
+            return products.get((product_type, product_id), None)
+
+        app_label, model_name = product_type.split(".")
+        model = apps.get_model(app_label, model_name)
+        content_type = ContentType.objects.get_for_model(model)
+        try:
+            product: Product = content_type.get_object_for_this_type(id=product_id)
+        except ObjectDoesNotExist:
+            return None
+        return product
+
     def validate_extra(self, value: dict[str, Any]) -> dict[str, Any]:
         context = self.context.copy()
         context["basket_item"] = self.instance
@@ -188,7 +256,7 @@ class BasketSerializer(serializers.ModelSerializer):
         fields = ["id", "items", "subtotal", "extra_rows", "total", "extra"]
 
     def to_representation(self, basket: BaseBasket) -> Any:
-        basket.update(self.context["request"])
+        basket.ensure_priced(self.context["request"])
         return super().to_representation(basket)
 
 
@@ -213,3 +281,124 @@ class BasketExtraSerializer(serializers.ModelSerializer):
             extra = {k: v for k, v in extra.items() if v is not None}
         # Validate using extra validator.
         return app_settings.SALESMAN_EXTRA_VALIDATOR(extra, context=self.context)
+
+
+class BasketQuoteSerializer(serializers.Serializer):
+    """
+    Serializer used to price items and basket extra on an unsaved basket
+    from context, without saving anything.
+    """
+
+    items = BasketItemCreateSerializer(many=True, write_only=True)
+    extra = serializers.JSONField(
+        default=dict, write_only=True, help_text=_("Basket extra JSON data.")
+    )
+
+    def validate_extra(self, value: dict[str, Any]) -> dict[str, Any]:
+        return app_settings.SALESMAN_EXTRA_VALIDATOR(value, context=self.context)
+
+    def create(self, validated_data: dict[str, Any]) -> BaseBasket:
+        basket: BaseBasket = self.context["basket"]
+        basket.extra = validated_data["extra"]
+        basket.set_items(validated_data["items"])
+        return basket
+
+    def to_representation(self, basket: BaseBasket) -> Any:
+        data = BasketSerializer(basket, context=self.context).data
+        # Unsaved basket and its items can't be referenced.
+        data.pop("id")
+        for item in data["items"]:
+            item.pop("url")
+        return data
+
+
+class BasketOperationListSerializer(serializers.ListSerializer):
+    """
+    Serializer used to apply a list of operations to basket in order.
+    Operations are applied atomically, none are saved if any of them fails.
+    """
+
+    def create(self, validated_data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        basket: BaseBasket = self.context["basket"]
+        storage = basket._storage if basket.in_storage else None
+        data = storage.dump(basket) if storage else None
+        lazy_request = basket._lazy_request
+        try:
+            with transaction.atomic():
+                for index, attrs in enumerate(validated_data):
+                    try:
+                        self.child.create(attrs)
+                    except serializers.ValidationError as e:
+                        raise serializers.ValidationError({str(index): e.detail})
+        except Exception:
+            # Discard changes made to the basket instance.
+            if storage and data is not None:
+                storage.load(basket, data)
+                storage.save(basket)
+            elif basket.pk and not type(basket).objects.filter(pk=basket.pk).exists():
+                # Lazy basket saved by the operations was rolled back.
+                request = lazy_request or self.context["request"]
+                type(basket).objects.clear_request_basket(request, basket)
+                basket.pk, basket._state.adding = None, True
+                basket._lazy_request = request
+                basket._cached_items = []
+            elif basket.pk:
+                basket.refresh_from_db(fields=["extra"])
+            basket.invalidate()
+            raise
+        return validated_data
+
+
+class BasketOperationSerializer(serializers.Serializer):
+    """
+    Serializer for a single basket operation. Other than ``op`` and ``ref``
+    the data is validated with a serializer for the operation when applied.
+    """
+
+    op = serializers.ChoiceField(
+        choices=["add", "update", "remove", "extra"],
+        help_text=_("Add item, update or remove item, or update basket extra."),
+    )
+    ref = serializers.SlugField(required=False)
+
+    class Meta:
+        list_serializer_class = BasketOperationListSerializer
+
+    def to_internal_value(self, data: Any) -> dict[str, Any]:
+        attrs: dict[str, Any] = super().to_internal_value(data)
+        attrs["data"] = {k: v for k, v in data.items() if k != "op"}
+        return attrs
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        if attrs["op"] in ["update", "remove"] and "ref" not in attrs:
+            raise serializers.ValidationError({"ref": _("This field is required.")})
+        return attrs
+
+    def create(self, validated_data: dict[str, Any]) -> BaseBasket:
+        basket: BaseBasket = self.context["basket"]
+        op, data = validated_data["op"], validated_data["data"]
+        serializer: serializers.BaseSerializer
+
+        if op == "remove":
+            basket.remove(validated_data["ref"])
+            return basket
+
+        if op == "add":
+            serializer = BasketItemCreateSerializer(data=data, context=self.context)
+        elif op == "update":
+            item = basket.find(validated_data["ref"])
+            if not item:
+                msg = _("Item with ref '{ref}' doesn't exist.")
+                raise serializers.ValidationError({"ref": msg.format(**validated_data)})
+            serializer = BasketItemSerializer(
+                item, data=data, partial=True, context=self.context
+            )
+        else:
+            serializer = BasketExtraSerializer(
+                basket, data=data, partial=True, context=self.context
+            )
+
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        basket.invalidate()
+        return basket
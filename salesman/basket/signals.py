@@ -0,0 +1,3 @@
+import django.dispatch
+
+basket_priced = django.dispatch.Signal()
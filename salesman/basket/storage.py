@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from secrets import token_hex
+from typing import TYPE_CHECKING, Any
+
+from django.http import HttpRequest
+
+from salesman.conf import app_settings
+from salesman.core.utils import get_salesman_cache, get_salesman_model
+
+from .models import BASKET_ID_SESSION_KEY
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .models import BaseBasket
+
+BASKET_TOKEN_SESSION_KEY = "BASKET_TOKEN"
+STORAGE_CACHE_KEY = "salesman:basket:{token}"
+
+
+class BaseBasketStorage:
+    """
+    Storage used to resolve the basket for a request, see ``SALESMAN_BASKET_STORAGE``.
+
+    Storage can keep baskets outside of the database, in which case the basket is
+    an unsaved instance with items kept in memory. Writes to the basket and its
+    items are then saved to the storage instead of the database, until the
+    basket is promoted to the database with ``promote()``.
+    """
+
+    def __init__(self, request: HttpRequest) -> None:
+        self.request = request
+
+    def get(self) -> BaseBasket:
+        """
+        Returns basket for the request.
+
+        Returns:
+            BaseBasket: Basket instance
+        """
+        raise NotImplementedError("Method `get()` is not implemented.")
+
+    def save(self, basket: BaseBasket) -> None:
+        """
+        Save basket kept in this storage, called after every write to the basket.
+
+        Args:
+            basket (BaseBasket): Basket instance
+        """
+        raise NotImplementedError("Method `save()` is not implemented.")
+
+    def delete(self, basket: BaseBasket) -> None:
+        """
+        Delete basket kept in this storage.
+
+        Args:
+            basket (BaseBasket): Basket instance
+        """
+        raise NotImplementedError("Method `delete()` is not implemented.")
+
+    def dump(self, basket: BaseBasket) -> dict[str, Any]:
+        """
+        Returns basket extra and items as a dict that can be stored.
+
+        Args:
+            basket (BaseBasket): Basket instance
+
+        Returns:
+            dict: Basket data
+        """
+        return deepcopy(
+            {
+                "extra": basket.extra,
+                "items": [
+                    [
+                        item.ref,
+                        item.product_content_type_id,
+                        item.product_id,
+                        item.quantity,
+                        item.extra,
+                    ]
+                    for item in basket._cached_items or []
+                ],
+            }
+        )
+
+    def load(self, basket: BaseBasket, data: dict[str, Any]) -> None:
+        """
+        Set basket extra and items from data returned by ``dump()``.
+        Items are unsaved and their products are loaded when accessed.
+
+        Args:
+            basket (BaseBasket): Unsaved basket instance
+            data (dict): Basket data
+        """
+        BasketItem = get_salesman_model("BasketItem")
+        basket.extra = data.get("extra", {})
+        basket._cached_items = [
+            BasketItem(
+                basket=basket,
+                ref=ref,
+                product_content_type_id=content_type_id,
+                product_id=product_id,
+                quantity=quantity,
+                extra=extra,
+            )
+            for ref, content_type_id, product_id, quantity, extra in data.get(
+                "items", []
+            )
+        ]
+        basket.invalidate()
+
+    def attach(self, basket: BaseBasket, data: dict[str, Any]) -> BaseBasket:
+        """
+        Returns basket loaded from data with writes saved to this storage.
+
+        Args:
+            basket (BaseBasket): Unsaved basket instance
+            data (dict): Basket data
+
+        Returns:
+            BaseBasket: Basket instance
+        """
+        self.load(basket, data)
+        basket._storage = self
+        basket._lazy_request = self.request
+        return basket
+
+    def promote(self, basket: BaseBasket) -> None:
+        """
+        Save basket kept in this storage to the database together with
+        its items and delete it from the storage.
+
+        Args:
+            basket (BaseBasket): Basket instance
+        """
+        items = basket.get_items()
+        basket._storage = None
+        basket.save()
+        get_salesman_model("BasketItem").objects.bulk_create(items)
+        basket.update_totals()
+        self.delete(basket)
+        if any(item.pk is None for item in items):
+            # Reload items when the database doesn't return ids of created rows.
+            basket.invalidate()
+
+
+class ModelBasketStorage(BaseBasketStorage):
+    """
+    Default storage that keeps baskets in the database. A new basket
+    is saved with the first write, see ``BaseBasket.save_lazy()``.
+    """
+
+    def get(self) -> BaseBasket:
+        Basket = get_salesman_model("Basket")
+        basket: BaseBasket
+        basket, _ = Basket.objects.get_or_create_from_request(self.request, lazy=True)
+        return basket
+
+
+class CacheBasketStorage(ModelBasketStorage):
+    """
+    Storage that keeps baskets of anonymous users in ``SALESMAN_CACHE`` under
+    a token stored in the session. Basket is promoted to the database at
+    checkout and merged into the user basket on login.
+    """
+
+    # Seconds to keep the basket in cache after the last write.
+    timeout: int | None = 60 * 60 * 24 * 14
+
+    def get(self) -> BaseBasket:
+        Basket = get_salesman_model("Basket")
+        if not hasattr(self.request, "session"):
+            self.request.session = {}
+        session = self.request.session
+        token = session.get(BASKET_TOKEN_SESSION_KEY, None)
+        data = get_salesman_cache().get(self.get_cache_key(token)) if token else None
+
+        basket: BaseBasket
+        user = getattr(self.request, "user", None)
+        if user and user.is_authenticated:
+            basket = super().get()
+            if data is not None:
+                # Merge basket into the user basket.
+                other = Basket()
+                self.load(other, data)
+                basket.bulk_add(
+                    [
+                        {
+                            "product": item.product,
+                            "quantity": item.quantity,
+                            "ref": item.ref,
+                            "extra": item.extra,
+                        }
+                        for item in other.get_items()
+                        if item.product
+                    ]
+                )
+                get_salesman_cache().delete(self.get_cache_key(token))
+                del session[BASKET_TOKEN_SESSION_KEY]
+            return basket
+
+        if data is None and BASKET_ID_SESSION_KEY in session:
+            # Basket was already promoted to the database.
+            basket = super().get()
+            if basket.pk:
+                return basket
+        return self.attach(Basket(), data or {})
+
+    def save(self, basket: BaseBasket) -> None:
+        session = self.request.session
+        token = session.get(BASKET_TOKEN_SESSION_KEY, None) or token_hex(16)
+        cache_key = self.get_cache_key(token)
+        get_salesman_cache().set(cache_key, self.dump(basket), self.timeout)
+        session[BASKET_TOKEN_SESSION_KEY] = token
+
+    def delete(self, basket: BaseBasket) -> None:
+        token = self.request.session.pop(BASKET_TOKEN_SESSION_KEY, None)
+        if token:
+            get_salesman_cache().delete(self.get_cache_key(token))
+
+    def get_cache_key(self, token: str) -> str:
+        """
+        Returns cache key for basket with the given token.
+        """
+        return STORAGE_CACHE_KEY.format(token=token)
+
+
+def get_basket_storage(request: HttpRequest) -> BaseBasketStorage:
+    """
+    Returns storage defined in ``SALESMAN_BASKET_STORAGE`` setting for request.
+
+    Args:
+        request (HttpRequest): Django request
+
+    Returns:
+        BaseBasketStorage: Storage instance
+    """
+    return app_settings.SALESMAN_BASKET_STORAGE(request)
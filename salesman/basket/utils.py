@@ -1,8 +1,20 @@
 from __future__ import annotations
 
-from typing import Any
+from hashlib import sha1
+from secrets import token_hex
+from typing import Any, Iterable
 
 from django.core.exceptions import ValidationError  # noqa
+from django.db.models import Model, QuerySet
+
+from salesman.conf import app_settings
+from salesman.core.utils import get_salesman_cache
+
+PRODUCT_VERSION_CACHE_KEY = "salesman:product-version:{label}"
+MODIFIER_VERSION_CACHE_KEY = "salesman:modifier-version:{identifier}"
+MODIFIER_CACHE_KEY = "salesman:modifier:{identifier}:{version}:{hook}:{key}"
+PRICING_CACHE_KEY = "salesman:basket-pricing:{key}"
+ITEM_RESULTS_CACHE_KEY = "salesman:basket-item-results:{id}"
 
 
 def validate_basket_item(
@@ -45,3 +57,113 @@ def validate_extra(
         dict: Validated value
     """
     return value
+
+
+def get_product_versions(labels: Iterable[str]) -> dict[str, str]:
+    """
+    Returns current versions for given product types. Versions are stored in
+    the ``SALESMAN_CACHE`` and a new one is generated if missing, so that
+    evicted versions never match an older basket snapshot.
+
+    Args:
+        labels (Iterable[str]): Product type labels formated as ``app_label.Model``
+
+    Returns:
+        dict: Versions keyed by lowercased product type label
+    """
+    cache = get_salesman_cache()
+    labels = {x.lower() for x in labels}
+    keys = {PRODUCT_VERSION_CACHE_KEY.format(label=x): x for x in labels}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, token_hex(8), None)
+        found[key] = cache.get(key)
+    return {label: found[key] for key, label in keys.items()}
+
+
+def bump_product_version(label: str) -> None:
+    """
+    Invalidate basket snapshots containing products of the given type.
+    Called automatically when a product is saved or deleted, should be called
+    manually when data affecting the product price is changed elsewhere.
+
+    Args:
+        label (str): Product type label formated as ``app_label.Model``
+    """
+    key = PRODUCT_VERSION_CACHE_KEY.format(label=label.lower())
+    get_salesman_cache().set(key, token_hex(8), None)
+
+
+def get_modifier_cache_key(identifier: str, hook: str, key: str) -> str:
+    """
+    Returns a cache key for modifier results, includes the current modifier
+    version so that results are invalidated with ``bump_modifier_version``
+    and ``SALESMAN_PRICE_PRECISION`` since cached amounts depend on it.
+
+    Args:
+        identifier (str): Modifier identifier
+        hook (str): Modifier method name
+        key (str): Key returned from the modifier ``get_cache_key()``
+
+    Returns:
+        str: Cache key
+    """
+    cache = get_salesman_cache()
+    version_key = MODIFIER_VERSION_CACHE_KEY.format(identifier=identifier)
+    version = cache.get(version_key, None)
+    if version is None:
+        cache.add(version_key, token_hex(8), None)
+        version = cache.get(version_key)
+    precision = app_settings.SALESMAN_PRICE_PRECISION
+    key = sha1(f"{precision}:{key}".encode()).hexdigest()
+    return MODIFIER_CACHE_KEY.format(
+        identifier=identifier, version=version, hook=hook, key=key
+    )
+
+
+def get_modifier_versions(identifiers: Iterable[str]) -> dict[str, str]:
+    """
+    Returns current versions for modifiers with given identifiers,
+    bumped with ``bump_modifier_version``.
+
+    Args:
+        identifiers (Iterable[str]): Modifier identifiers
+
+    Returns:
+        dict: Versions keyed by modifier identifier
+    """
+    cache = get_salesman_cache()
+    keys = {MODIFIER_VERSION_CACHE_KEY.format(identifier=x): x for x in identifiers}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, token_hex(8), None)
+        found[key] = cache.get(key)
+    return {identifier: found[key] for key, identifier in keys.items()}
+
+
+def bump_modifier_version(identifier: str) -> None:
+    """
+    Invalidate cached results of the modifier with given identifier
+    and basket pricing results shared between baskets.
+
+    Args:
+        identifier (str): Modifier identifier
+    """
+    key = MODIFIER_VERSION_CACHE_KEY.format(identifier=identifier)
+    get_salesman_cache().set(key, token_hex(8), None)
+
+
+def get_product_queryset(model: type[Model]) -> QuerySet[Any]:
+    """
+    Returns a queryset for loading products of the given type, tuned with
+    options defined for the product type in ``SALESMAN_PRODUCT_TYPES``.
+
+    Args:
+        model (type[Model]): Product model
+
+    Returns:
+        QuerySet: Products queryset
+    """
+    queryset = model._default_manager.all()
+    function = app_settings.SALESMAN_PRODUCT_QUERYSETS.get(model._meta.label, None)
+    return function(queryset) if function else queryset
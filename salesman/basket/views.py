@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Any
 
 from django.db.models import QuerySet
-from django.http import HttpRequest
+from django.http import Http404, HttpRequest
 from django.http.response import HttpResponseBase
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
@@ -14,16 +14,20 @@ from rest_framework.response import Response
 from rest_framework.serializers import BaseSerializer
 
 from salesman.basket.models import BaseBasket, BaseBasketItem
+from salesman.basket.profiling import explain_pricing, is_explain_request
 from salesman.core.utils import get_salesman_model
 
 from .serializers import (
     BasketExtraSerializer,
     BasketItemCreateSerializer,
     BasketItemSerializer,
+    BasketOperationSerializer,
+    BasketQuoteSerializer,
     BasketSerializer,
 )
 
 Basket = get_salesman_model("Basket")
+BasketItem = get_salesman_model("BasketItem")
 
 
 class BasketViewSet(viewsets.ModelViewSet):
@@ -48,12 +52,31 @@ class BasketViewSet(viewsets.ModelViewSet):
         if self._basket:
             return self._basket
         basket: BaseBasket
-        basket, _ = Basket.objects.get_or_create_from_request(self.request)
+        if self.action == "quote":
+            # Quotes are priced on an unsaved basket.
+            user = getattr(self.request, "user", None)
+            basket = Basket(user=user if user and user.is_authenticated else None)
+        else:
+            basket = Basket.objects.get_from_request(self.request)
         self._basket = basket
         return basket
 
     def get_queryset(self) -> QuerySet[BaseBasketItem]:
-        return self.get_basket().items.all()
+        basket = self.get_basket()
+        if not basket.pk:
+            return BasketItem.objects.none()
+        return basket.items.all()
+
+    def get_object(self) -> BaseBasketItem:
+        basket = self.get_basket()
+        if basket.pk:
+            item: BaseBasketItem = super().get_object()
+            return item
+        # Items of a basket outside of the database are kept in memory.
+        found = basket.find(self.kwargs[self.lookup_field])
+        if found is None:
+            raise Http404
+        return found
 
     def get_serializer_class(self) -> type[BaseSerializer]:
         if self.action == "create":
@@ -65,6 +88,14 @@ class BasketViewSet(viewsets.ModelViewSet):
         context["basket"] = self.get_basket()
         return context
 
+    def perform_update(self, serializer: BaseSerializer) -> None:
+        super().perform_update(serializer)
+        self.get_basket().invalidate()
+
+    def perform_destroy(self, instance: BaseBasketItem) -> None:
+        super().perform_destroy(instance)
+        self.get_basket().invalidate()
+
     def get_basket_response(self) -> Response:
         context = self.get_serializer_context()
         serializer = BasketSerializer(self.get_basket(), context=context)
@@ -78,14 +109,23 @@ class BasketViewSet(viewsets.ModelViewSet):
         **kwargs: Any,
     ) -> Response:
         """
-        Patch response to render the Basket when `?basket` is present in the url.
+        Patch response to render the Basket when `?basket` is present in the url,
+        except for quotes which already render the priced basket.
+        Add pricing breakdown for staff when `?explain` is present in the url.
         """
         if (
             request.method != "GET"
+            and self.action != "quote"
             and "basket" in request.GET
             and status.is_success(response.status_code)
         ):
             response = self.get_basket_response()
+        if (
+            is_explain_request(request)
+            and status.is_success(response.status_code)
+            and isinstance(response.data, dict)
+        ):
+            response.data["explain"] = explain_pricing(self.get_basket(), request)
         return super().finalize_response(request, response, *args, **kwargs)
 
     @method_decorator(never_cache)
@@ -103,6 +143,18 @@ class BasketViewSet(viewsets.ModelViewSet):
         """
         return self.get_basket_response()
 
+    def patch(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """
+        Apply a list of operations to the basket.
+        """
+        context = self.get_serializer_context()
+        serializer = BasketOperationSerializer(
+            data=request.data, many=True, context=context
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return self.get_basket_response()
+
     def delete(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """
         Delete the basket.
@@ -124,6 +176,28 @@ class BasketViewSet(viewsets.ModelViewSet):
         """
         return Response({"quantity": self.get_basket().quantity})
 
+    @action(["post"], False, serializer_class=BasketItemCreateSerializer)
+    def bulk(self, request: Request) -> Response:
+        """
+        Add many items to basket at once.
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        response = self.get_basket_response()
+        response.status_code = status.HTTP_201_CREATED
+        return response
+
+    @action(["post"], False, serializer_class=BasketQuoteSerializer)
+    def quote(self, request: Request) -> Response:
+        """
+        Price items and basket extra without saving the basket.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
     @action(["post"], False, serializer_class=BasketSerializer)
     def clear(self, request: Request) -> Response:
         """
@@ -150,4 +224,5 @@ class BasketViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(basket, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        basket.invalidate()
         return Response(serializer.data)
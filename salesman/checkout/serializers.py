@@ -103,6 +103,8 @@ class CheckoutSerializer(serializers.Serializer):
         basket.extra["email"] = self.validated_data["email"]
         basket.extra["shipping_address"] = self.validated_data["shipping_address"]
         basket.extra["billing_address"] = self.validated_data["billing_address"]
+        # Move basket kept in storage to the database before the payment.
+        basket.promote()
         basket.save(update_fields=["extra"])
         # Process the payment.
         payment = self.validated_data["payment_method"]
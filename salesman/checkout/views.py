@@ -12,6 +12,8 @@ from rest_framework.exceptions import PermissionDenied
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from salesman.basket.models import BaseBasket
+from salesman.basket.profiling import explain_pricing, is_explain_request
 from salesman.conf import app_settings
 from salesman.core.utils import get_salesman_model
 
@@ -37,12 +39,40 @@ class CheckoutViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     def get_queryset(self) -> None:
         pass
 
+    _basket: BaseBasket | None = None
+
+    def get_basket(self) -> BaseBasket:
+        if self._basket:
+            return self._basket
+        basket: BaseBasket = Basket.objects.get_from_request(self.request)
+        self._basket = basket
+        return basket
+
     def get_serializer_context(self) -> dict[str, Any]:
         context = super().get_serializer_context()
-        context["basket"], _ = Basket.objects.get_or_create_from_request(self.request)
-        context["basket"].update(self.request)
+        context["basket"] = self.get_basket()
+        context["basket"].ensure_priced(self.request)
         return context
 
+    def finalize_response(
+        self,
+        request: Request,
+        response: Response,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Response:
+        """
+        Add pricing breakdown for staff when `?explain` is present in the url.
+        """
+        if (
+            is_explain_request(request)
+            and status.is_success(response.status_code)
+            and isinstance(response.data, dict)
+            and self.get_basket().pk
+        ):
+            response.data["explain"] = explain_pricing(self.get_basket(), request)
+        return super().finalize_response(request, response, *args, **kwargs)
+
     def check_permissions(self, request: Request) -> None:
         super().check_permissions(request)
 
@@ -6,10 +6,12 @@ from typing import TYPE_CHECKING, Any, Callable
 from django.utils.functional import cached_property
 
 if TYPE_CHECKING:  # pragma: no cover
+    from django.db.models import QuerySet
     from django.http import HttpRequest
     from rest_framework.serializers import Serializer
 
     from salesman.basket.modifiers import BasketModifier
+    from salesman.basket.storage import BaseBasketStorage
     from salesman.checkout.payment import PaymentMethod
     from salesman.orders.status import BaseOrderStatus
 
@@ -21,6 +23,11 @@ class AppSettings:
         A dictionary of product types and their respected serializers
         that are availible for purchase as product. Should be
         formated as ``'app_label.Model': 'path.to.Serializer'``.
+
+        Product type can also be defined as a dict with ``serializer`` key and
+        optional ``select_related``, ``prefetch_related`` and ``only`` lists or a
+        ``queryset`` dotted path to a function that receives and returns a queryset.
+        Those are used to load products of that type for basket items in one query.
         """
         from salesman.core.typing import Product
 
@@ -29,6 +36,8 @@ class AppSettings:
 
         for key, value in product_types.items():
             model = self._model(key)
+            if isinstance(value, dict):
+                value = value.get("serializer", None)
             ret[key] = self._class(value)
 
             if not isinstance(model, Product):
@@ -40,6 +49,32 @@ class AppSettings:
                 )
         return ret
 
+    @cached_property
+    def SALESMAN_PRODUCT_QUERYSETS(
+        self,
+    ) -> dict[str, Callable[[QuerySet[Any]], QuerySet[Any]]]:
+        """
+        A dictionary of product types and functions used to tune the queryset
+        when loading products for basket items. Derived from product types that
+        are defined as a dict in ``SALESMAN_PRODUCT_TYPES`` setting.
+        """
+        product_types = self._setting("SALESMAN_PRODUCT_TYPES", {})
+        ret = {}
+
+        for key, value in product_types.items():
+            if not isinstance(value, dict):
+                continue
+            function = None
+            if value.get("queryset", None):
+                function = self._function(value["queryset"])
+            ret[key] = self._queryset_function(
+                select_related=value.get("select_related", []),
+                prefetch_related=value.get("prefetch_related", []),
+                only=value.get("only", []),
+                function=function,
+            )
+        return ret
+
     @cached_property
     def SALESMAN_BASKET_MODIFIERS(self) -> list[type[BasketModifier]]:
         """
@@ -99,6 +134,74 @@ class AppSettings:
         self._model_label(value)
         return value
 
+    @cached_property
+    def SALESMAN_BASKET_STORAGE(self) -> type[BaseBasketStorage]:
+        """
+        A dotted path to basket storage class used to resolve the basket for
+        a request. Use ``salesman.basket.storage.CacheBasketStorage`` to keep
+        baskets of anonymous users in ``SALESMAN_CACHE`` until checkout or login.
+        Storage must extend ``salesman.basket.storage.BaseBasketStorage`` class.
+        """
+        from salesman.basket.storage import BaseBasketStorage
+
+        default = "salesman.basket.storage.ModelBasketStorage"
+        value = self._setting("SALESMAN_BASKET_STORAGE", default)
+        storage: type[BaseBasketStorage] = self._class(value)
+        if not issubclass(storage, BaseBasketStorage):
+            self._error(f"Storage `{storage}` must subclass `{BaseBasketStorage}`.")
+        return storage
+
+    @property
+    def SALESMAN_BASKET_SNAPSHOT(self) -> bool:
+        """
+        Set to ``True`` to store computed basket totals on the basket together with
+        a fingerprint of its contents. When the fingerprint matches on later requests
+        totals are served from the snapshot without loading products or running
+        the modifiers. Modifiers that depend on the request must declare it in
+        ``BasketModifier.get_request_key()``.
+        """
+        value: bool = self._setting("SALESMAN_BASKET_SNAPSHOT", False)
+        return value
+
+    @property
+    def SALESMAN_BASKET_PRICING_CACHE(self) -> bool:
+        """
+        Set to ``True`` to share computed basket totals between baskets with the
+        same contents in ``SALESMAN_CACHE``. Results are keyed by products, quantities
+        and extra of the items, basket extra, product and modifier versions and
+        request keys declared in ``BasketModifier.get_request_key()``.
+        """
+        value: bool = self._setting("SALESMAN_BASKET_PRICING_CACHE", False)
+        return value
+
+    @property
+    def SALESMAN_BASKET_PRICING_CACHE_TIMEOUT(self) -> int | None:
+        """
+        Seconds to keep shared basket pricing results and reusable item results
+        cached. Defaults to ``300``.
+        """
+        value: int | None = self._setting("SALESMAN_BASKET_PRICING_CACHE_TIMEOUT", 300)
+        return value
+
+    @property
+    def SALESMAN_BASKET_PROFILING(self) -> bool:
+        """
+        Set to ``True`` to collect modifier timings, call counts and extra rows
+        for every basket pricing. Stats are aggregated in ``SALESMAN_CACHE``
+        and can be shown with ``salesman_modifier_stats`` management command,
+        which requires a cache shared between processes (not ``LocMemCache``).
+        """
+        value: bool = self._setting("SALESMAN_BASKET_PROFILING", False)
+        return value
+
+    @property
+    def SALESMAN_CACHE(self) -> str:
+        """
+        Name of the Django cache (as defined in ``CACHES`` setting) used by Salesman.
+        """
+        value: str = self._setting("SALESMAN_CACHE", "default")
+        return value
+
     @cached_property
     def SALESMAN_PAYMENT_METHODS(self) -> list[type[PaymentMethod]]:
         """
@@ -247,6 +350,36 @@ class AppSettings:
         value = self._setting("SALESMAN_PRICE_FORMATTER", default)
         return self._function(value)
 
+    @cached_property
+    def SALESMAN_PRICE_PRECISION(self) -> int | None:
+        """
+        Number of decimal places in the currency minor unit (eg. ``2`` for cents).
+        When set, basket pricing is done with integer amounts in minor units that
+        are converted back to ``Decimal`` when serialized or saved to the order.
+        Defaults to ``None`` which prices baskets using ``Decimal`` values.
+        """
+        value: int | None = self._setting("SALESMAN_PRICE_PRECISION", None)
+        if value is not None and (
+            not isinstance(value, int) or isinstance(value, bool) or value < 0
+        ):
+            self._error(
+                "Setting `SALESMAN_PRICE_PRECISION` must be a non-negative int."
+            )
+        return value
+
+    @cached_property
+    def SALESMAN_PRICE_ROUNDING(self) -> str:
+        """
+        Rounding mode from the ``decimal`` module used when converting prices
+        and modifier amounts to minor units. Defaults to ``ROUND_HALF_UP``.
+        """
+        import decimal
+
+        value: str = self._setting("SALESMAN_PRICE_ROUNDING", decimal.ROUND_HALF_UP)
+        if not value.startswith("ROUND_") or getattr(decimal, value, None) != value:
+            self._error(f"Invalid rounding mode `{value}`, use one from `decimal`.")
+        return value
+
     @cached_property
     def SALESMAN_ADDRESS_VALIDATOR(self) -> Callable[..., str]:
         """
@@ -325,6 +458,26 @@ class AppSettings:
         except (LookupError, ValueError) as e:
             self._error(e)
 
+    def _queryset_function(
+        self,
+        select_related: list[str],
+        prefetch_related: list[str],
+        only: list[str],
+        function: Callable[..., Any] | None,
+    ) -> Callable[[QuerySet[Any]], QuerySet[Any]]:
+        def apply(queryset: QuerySet[Any]) -> QuerySet[Any]:
+            if select_related:
+                queryset = queryset.select_related(*select_related)
+            if prefetch_related:
+                queryset = queryset.prefetch_related(*prefetch_related)
+            if only:
+                queryset = queryset.only(*only)
+            if function:
+                queryset = function(queryset)
+            return queryset
+
+        return apply
+
     def _class(self, path: str) -> Any:
         value = self._import(path)
         if not inspect.isclass(value):
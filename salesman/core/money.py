@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+from salesman.conf import app_settings
+
+Amount = Decimal | int
+
+
+def to_amount(value: Any) -> Amount:
+    """
+    Convert a price in major units (eg. one returned from ``product.get_price``)
+    to an amount used during basket pricing. When ``SALESMAN_PRICE_PRECISION``
+    is set amount is an integer in minor units, rounded using
+    ``SALESMAN_PRICE_ROUNDING``, otherwise a ``Decimal`` is returned.
+
+    Args:
+        value (Any): Price in major units
+
+    Returns:
+        Amount: Pricing amount
+    """
+    precision = app_settings.SALESMAN_PRICE_PRECISION
+    if precision is None:
+        return Decimal(value)
+    return _round(_decimal(value).scaleb(precision))
+
+
+def coerce_amount(value: Any) -> Amount:
+    """
+    Coerce a value already in pricing units (eg. computed by a modifier from
+    the basket total or read from a stored snapshot) to a pricing amount.
+    When ``SALESMAN_PRICE_PRECISION`` is set value is rounded to an integer
+    using ``SALESMAN_PRICE_ROUNDING``, otherwise a ``Decimal`` is returned.
+
+    Args:
+        value (Any): Value in pricing units
+
+    Returns:
+        Amount: Pricing amount
+    """
+    if app_settings.SALESMAN_PRICE_PRECISION is None:
+        return Decimal(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return _round(_decimal(value))
+
+
+def to_decimal(value: Any) -> Decimal:
+    """
+    Convert a pricing amount back to a ``Decimal`` price in major units.
+    Integer amounts are treated as minor units when ``SALESMAN_PRICE_PRECISION``
+    is set, other values are returned as ``Decimal`` unchanged.
+
+    Args:
+        value (Any): Pricing amount
+
+    Returns:
+        Decimal: Price in major units
+    """
+    precision = app_settings.SALESMAN_PRICE_PRECISION
+    if precision is None or not isinstance(value, int) or isinstance(value, bool):
+        return value if isinstance(value, Decimal) else Decimal(value)
+    return Decimal(value).scaleb(-precision)
+
+
+def _decimal(value: Any) -> Decimal:
+    # Use the shortest float representation to avoid rounding binary noise.
+    return Decimal(repr(value)) if isinstance(value, float) else Decimal(value)
+
+
+def _round(value: Decimal) -> int:
+    rounding = app_settings.SALESMAN_PRICE_ROUNDING
+    return int(value.to_integral_value(rounding=rounding))
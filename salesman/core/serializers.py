@@ -1,6 +1,9 @@
+from typing import Any
+
 from rest_framework import serializers
 
 from salesman.conf import app_settings
+from salesman.core.money import to_decimal
 
 
 class PriceField(serializers.CharField):
@@ -8,5 +11,6 @@ class PriceField(serializers.CharField):
     Price field used to display formated price whitin a serializer.
     """
 
-    def to_representation(self, value: str) -> str:
+    def to_representation(self, value: Any) -> str:
+        value = to_decimal(value)
         return app_settings.SALESMAN_PRICE_FORMATTER(value, context=self.context)
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from decimal import Decimal
 from typing import Any, Protocol, runtime_checkable
 
@@ -27,3 +29,28 @@ class Product(Protocol):
         Returns:
             Decimal: Product price
         """
+
+
+@runtime_checkable
+class BatchPricedProduct(Product, Protocol):
+    """
+    Optional product protocol extension for products that can be priced in bulk.
+    When implemented basket prices all items of this type with a single call.
+    """
+
+    @classmethod
+    def get_prices(
+        cls,
+        products: list[BatchPricedProduct],
+        request: HttpRequest,
+    ) -> list[Decimal]:
+        """
+        Method that returns prices for many products of this type at once.
+
+        Args:
+            products (list[BatchPricedProduct]): Product instances
+            request (HttpRequest): Django request
+
+        Returns:
+            list[Decimal]: Product prices in the same order as products
+        """
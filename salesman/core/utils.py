@@ -4,6 +4,7 @@ from decimal import Decimal
 from typing import Any
 
 from django.apps import apps
+from django.core.cache import BaseCache, caches
 
 from salesman.conf import app_settings
 
@@ -43,3 +44,13 @@ def get_salesman_model(name: str) -> Any:
         raise ValueError(f"Model `{name}` is not a valid Salesman model.")
 
     return apps.get_model(value)
+
+
+def get_salesman_cache() -> BaseCache:
+    """
+    Returns a Django cache defined in ``SALESMAN_CACHE`` setting.
+
+    Returns:
+        BaseCache: Cache instance
+    """
+    return caches[app_settings.SALESMAN_CACHE]
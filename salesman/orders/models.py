@@ -5,6 +5,7 @@ from decimal import Decimal
 from secrets import token_urlsafe
 from typing import TYPE_CHECKING, Any
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
@@ -16,6 +17,7 @@ from django.utils.translation import gettext_lazy as _
 
 from salesman.basket.models import BaseBasket, BaseBasketItem
 from salesman.conf import app_settings
+from salesman.core.money import to_decimal
 from salesman.core.typing import Product
 from salesman.core.utils import get_salesman_model
 from salesman.orders.status import BaseOrderStatus
@@ -71,6 +73,18 @@ class OrderManager(models.Manager):
         order.populate_from_basket(basket, request)
         return order
 
+    async def acreate_from_basket(
+        self,
+        basket: BaseBasket,
+        request: HttpRequest,
+        **kwargs: Any,
+    ) -> BaseOrder:
+        """
+        Async version of ``create_from_basket()``, runs in a thread since
+        the order is populated in a transaction.
+        """
+        return await sync_to_async(self.create_from_basket)(basket, request, **kwargs)
+
 
 class BaseOrder(ClusterableModel):
     user = models.ForeignKey(
@@ -191,6 +205,24 @@ class BaseOrder(ClusterableModel):
         )
         return payment
 
+    async def apay(
+        self,
+        amount: Decimal,
+        transaction_id: str,
+        payment_method: str = "",
+    ) -> BaseOrderPayment:
+        """
+        Async version of ``pay()``.
+        """
+        OrderPayment = get_salesman_model("OrderPayment")
+        payment: BaseOrderPayment = await OrderPayment.objects.acreate(
+            order=self,
+            amount=amount,
+            transaction_id=transaction_id,
+            payment_method=payment_method,
+        )
+        return payment
+
     @transaction.atomic
     def populate_from_basket(
         self,
@@ -214,10 +246,11 @@ class BaseOrder(ClusterableModel):
         self.email = basket.extra.pop("email", "")
         self.shipping_address = basket.extra.pop("shipping_address", "")
         self.billing_address = basket.extra.pop("billing_address", "")
-        self.subtotal = basket.subtotal
-        self.total = basket.total
+        self.subtotal = to_decimal(basket.subtotal)
+        self.total = to_decimal(basket.total)
         self.extra = basket.extra
-        self.extra_rows = ExtraRowsField().to_representation(basket.extra_rows)
+        extra_rows_field = ExtraRowsField(context={"request": request})
+        self.extra_rows = extra_rows_field.to_representation(basket.extra_rows)
         if self.status == self.Status.NEW:
             self.status = self.Status.CREATED
         for attr, value in kwargs.items():
@@ -407,12 +440,13 @@ class BaseOrderItem(models.Model):
         product_data.update({"name": product.name, "code": product.code})
         self.product_data = product_data
 
-        self.unit_price = item.unit_price
-        self.subtotal = item.subtotal
-        self.total = item.total
+        self.unit_price = to_decimal(item.unit_price)
+        self.subtotal = to_decimal(item.subtotal)
+        self.total = to_decimal(item.total)
         self.quantity = item.quantity
         self.extra = item.extra
-        self.extra_rows = ExtraRowsField().to_representation(item.extra_rows)
+        extra_rows_field = ExtraRowsField(context={"request": request})
+        self.extra_rows = extra_rows_field.to_representation(item.extra_rows)
 
     @property
     def name(self) -> str: